@@ -1,7 +1,6 @@
 """Handle the loading and initialization of game sessions."""
 from __future__ import annotations
 
-import copy
 import lzma
 import pickle
 import traceback
@@ -22,21 +21,26 @@ from maps.game_map import GameWorld
 
 save_location = Path("savegames/savegame.sav")
 
-
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
-    player = copy.deepcopy(create_monster_from_json('data/monsters/player.json', 'player'))
-    engine = Engine(player=player)
-
-    # Settings for the first floor go here
-    engine.game_world = GameWorld(
-        max_rooms=25,
-        room_min_size=6,
-        room_max_size=10,
-        map_width=80,
-        map_height=43,
-        engine=engine
-    )
+# Settings for the first floor of a new game
+first_floor_settings = {
+    "max_rooms": 25,
+    "room_min_size": 6,
+    "room_max_size": 10,
+    "map_width": 80,
+    "map_height": 43
+}
+
+
+def new_game(seed: Optional[int] = None, floor_cache: Optional[str] = None) -> Engine:
+    """
+    Return a brand new game session as an Engine instance. Games started with the same seed generate the same floors,
+    which are reused from the floor_cache directory if one is given.
+    """
+    close_game()
+    player = create_monster_from_json('data/monsters/player.json', 'player')
+    engine = Engine(player=player, seed=seed)
+
+    engine.game_world = GameWorld(engine=engine, floor_cache=floor_cache, **first_floor_settings)
     engine.game_world.generate_floor()
     engine.update_fov()
 
@@ -46,9 +50,9 @@ def new_game() -> Engine:
     )
 
     # Spawn starting player equipment
-    dagger = copy.deepcopy(create_item_from_json('data/items/weapons.json', 'dagger'))
-    leather_armor = copy.deepcopy(create_item_from_json('data/items/armour.json', 'leather_armour'))
-    medkit = copy.deepcopy(create_item_from_json('data/items/healing.json', 'medkit'))
+    dagger = create_item_from_json('data/items/weapons.json', 'dagger')
+    leather_armor = create_item_from_json('data/items/armour.json', 'leather_armour')
+    medkit = create_item_from_json('data/items/healing.json', 'medkit')
 
     dagger.parent = player.inventory
     leather_armor.parent = player.inventory
@@ -71,6 +75,12 @@ def new_game() -> Engine:
     return engine
 
 
+def close_game() -> None:
+    """Stop the background floor generation of the active game, if any, before the game is discarded."""
+    if hasattr(core.g, "engine"):
+        core.g.engine.game_world.stop_pregeneration()
+
+
 def save_game(path: Path) -> None:
     """If an engine is active then save it."""
     if not hasattr(core.g, "engine"):
@@ -81,9 +91,11 @@ def save_game(path: Path) -> None:
 
 def load_game(path: Path) -> Engine:
     """Load an Engine instance from a file."""
+    close_game()
     engine = pickle.loads(lzma.decompress(path.read_bytes()))
     assert isinstance(engine, Engine)
     core.g.engine = engine
+    engine.game_world.start_pregeneration()
     return engine
 
 
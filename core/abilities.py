@@ -51,14 +51,14 @@ class ShoveAction(AbilityAction):
             core.g.engine.message_log.add_message("The target cannot be pushed into the destination",
                                                   config.colour.impossible)
             return None
-        elif not core.g.engine.game_map.tiles['walkable'][self.target.x + dx, self.target.y + dy]:
+        elif not core.g.engine.game_map.is_walkable(self.target.x + dx, self.target.y + dy):
             core.g.engine.message_log.add_message(f"You push the {self.target.name}, but it has no space to move away.",
                                                   config.colour.enemy_evade)
             return None
         else:
             # Calculate if push lands successfully
-            attack_roll = roll_dice(1, 20) + self.caster.fighter.strength_modifier
-            defend_roll = roll_dice(1, 20) + self.target.fighter.strength_modifier
+            attack_roll = roll_dice(1, 20, core.g.engine.rng.combat) + self.caster.fighter.strength_modifier
+            defend_roll = roll_dice(1, 20, core.g.engine.rng.combat) + self.target.fighter.strength_modifier
             # if attack_roll > defend_roll:
             core.g.engine.message_log.add_message(f"You push the {self.target.name} and it stumbles backwards!",
                                                   config.colour.ability_used)
@@ -1,12 +1,10 @@
 from __future__ import annotations
 
 import logging
-import random
 from math import hypot
 from typing import Optional, Tuple, TYPE_CHECKING, List
 
 import numpy as np
-import tcod
 
 import config.colour
 import core.g
@@ -37,7 +35,7 @@ class PickupAction(Action):
                 if len(inventory.items) >= inventory.capacity:
                     raise Impossible("Your inventory is full.")
 
-                core.g.engine.game_map.entities.remove(item)
+                core.g.engine.game_map.remove_entity(item)
                 item.parent = self.entity.inventory
                 inventory.items.append(item)
 
@@ -137,9 +135,9 @@ class MeleeAction(ActionWithDirection):
         modifiers = self.entity.equipment.get_active_modifiers()
 
         # Roll to see if hit
-        attack_roll = roll_dice(1, 20) + attacker.fighter.dexterity_modifier
+        attack_roll = roll_dice(1, 20, core.g.engine.rng.combat) + attacker.fighter.dexterity_modifier
         if defender.fighter.dodges:
-            dodge_roll = roll_dice(1, 20) + defender.fighter.dexterity_modifier
+            dodge_roll = roll_dice(1, 20, core.g.engine.rng.combat) + defender.fighter.dexterity_modifier
         else:
             dodge_roll = 0
 
@@ -149,7 +147,7 @@ class MeleeAction(ActionWithDirection):
             # Calculate strength-weighted damage roll
             damage_roll = attacker.fighter.damage + attacker.fighter.strength_modifier
             if defender.fighter.armour_total > 0:
-                defence_roll = roll_dice(1, defender.fighter.armour_total)
+                defence_roll = roll_dice(1, defender.fighter.armour_total, core.g.engine.rng.combat)
             else:
                 defence_roll = 0
 
@@ -161,7 +159,8 @@ class MeleeAction(ActionWithDirection):
                     self.crit_chance += 0.01
                     penetration_int -= 1
                 # Check if crit
-                if roll_dice(1, np.floor(1 / self.crit_chance)) == np.floor(1 / self.crit_chance):
+                if roll_dice(1, np.floor(1 / self.crit_chance),
+                             core.g.engine.rng.combat) == np.floor(1 / self.crit_chance):
                     crit = True
                     damage = attacker.fighter.crit_damage - defence_roll
                 else:
@@ -177,7 +176,8 @@ class MeleeAction(ActionWithDirection):
                 if self.crit_chance <= 0:
                     damage = 0
                 else:
-                    if roll_dice(1, np.floor(1 / self.crit_chance)) == np.floor(1 / self.crit_chance):
+                    if roll_dice(1, np.floor(1 / self.crit_chance),
+                                 core.g.engine.rng.combat) == np.floor(1 / self.crit_chance):
                         crit = True
                         damage = attacker.fighter.crit_damage - defence_roll
                     else:
@@ -219,7 +219,8 @@ class MeleeAction(ActionWithDirection):
                     # Roll for poison if damage is dealt!
                     for modifier in modifiers:
                         if isinstance(modifier, parts.effects.PoisonModifier):
-                            if roll_dice(1, defender.fighter.base_vitality) < modifier.difficulty:
+                            vitality_roll = roll_dice(1, defender.fighter.base_vitality, core.g.engine.rng.combat)
+                            if vitality_roll < modifier.difficulty:
                                 effect = parts.effects.PoisonEffect(damage=modifier.damage, turns=modifier.turns)
                                 effect.parent = defender
 
@@ -270,9 +271,9 @@ class BrainRakerAction(MeleeAction):
         max_crit_chance = 0.33  # Define max chance to stop overflows!
 
         # Roll to see if hit
-        attack_roll = roll_dice(1, 20) + attacker.fighter.dexterity_modifier
+        attack_roll = roll_dice(1, 20, core.g.engine.rng.combat) + attacker.fighter.dexterity_modifier
         if defender.fighter.dodges:
-            dodge_roll = roll_dice(1, 20) + defender.fighter.dexterity_modifier
+            dodge_roll = roll_dice(1, 20, core.g.engine.rng.combat) + defender.fighter.dexterity_modifier
         else:
             dodge_roll = 0
 
@@ -282,7 +283,7 @@ class BrainRakerAction(MeleeAction):
             # Calculate strength-weighted damage roll
             damage_roll = attacker.fighter.damage + attacker.fighter.strength_modifier
             if defender.fighter.armour_total > 0:
-                defence_roll = roll_dice(1, defender.fighter.armour_total)
+                defence_roll = roll_dice(1, defender.fighter.armour_total, core.g.engine.rng.combat)
             else:
                 defence_roll = 0
 
@@ -294,7 +295,7 @@ class BrainRakerAction(MeleeAction):
                     crit_chance += 0.01
                     penetration_int -= 1
                 # Check if crit
-                if roll_dice(1, np.floor(1 / crit_chance)) == np.floor(1 / crit_chance):
+                if roll_dice(1, np.floor(1 / crit_chance), core.g.engine.rng.combat) == np.floor(1 / crit_chance):
                     crit = True
                     # For mindrakers crits do not do double damage, they do small extra damage and an effect
                     damage = attacker.fighter.damage + 2 - defence_roll
@@ -311,7 +312,7 @@ class BrainRakerAction(MeleeAction):
                 if crit_chance <= 0:
                     damage = 0
                 else:
-                    if roll_dice(1, np.floor(1 / crit_chance)) == np.floor(1 / crit_chance):
+                    if roll_dice(1, np.floor(1 / crit_chance), core.g.engine.rng.combat) == np.floor(1 / crit_chance):
                         crit = True
                         damage = attacker.fighter.crit_damage - defence_roll
                     else:
@@ -328,8 +329,8 @@ class BrainRakerAction(MeleeAction):
                         if not num_explored <= len(self.entity.gamemap.visible):
                             to_remove = round(num_explored / 4)
                             while to_remove > 0:
-                                x = random.choice(np.where(explored_nonfov == True)[0])
-                                y = random.choice(np.where(explored_nonfov == True)[1])
+                                x = core.g.engine.rng.combat.choice(np.where(explored_nonfov == True)[0])
+                                y = core.g.engine.rng.combat.choice(np.where(explored_nonfov == True)[1])
                                 self.entity.gamemap.explored[x, y] = False
                                 to_remove -= 1
 
@@ -388,7 +389,7 @@ class MovementAction(ActionWithDirection):
         if not core.g.engine.game_map.in_bounds(dest_x, dest_y):
             # Destination is out of bounds.
             raise Impossible("That way is blocked.")
-        if not core.g.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+        if not core.g.engine.game_map.is_walkable(dest_x, dest_y):
             # Destination is blocked by a tile.
             raise Impossible("That way is blocked.")
         if core.g.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
@@ -411,7 +412,7 @@ class SwapAction(ActionWithDirection):
         if not core.g.engine.game_map.in_bounds(dest_x, dest_y):
             # Destination is out of bounds.
             raise Impossible("That way is blocked.")
-        if not core.g.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+        if not core.g.engine.game_map.is_walkable(dest_x, dest_y):
             # Destination is blocked by a tile.
             raise Impossible("That way is blocked.")
 
@@ -441,19 +442,16 @@ class ExploreAction(Action):
         return True
 
     def init_coords(self):
-        self.unexplored_coords = []
-        for y in range(core.g.engine.game_map.height):
-            for x in range(core.g.engine.game_map.width):
-                if not core.g.engine.game_map.explored[x, y] and core.g.engine.game_map.accessible[x, y]:
-                    self.unexplored_coords.append((y, x))
+        game_map = core.g.engine.game_map
+        unexplored = ~game_map.explored & game_map.accessible
+        self.unexplored_coords = [(y, x) for y, x in np.argwhere(unexplored.T).tolist()]
 
     def enemy_in_fov(self) -> str:
         """Checks if there in an enemy in player FOV which will interrupt the explore action."""
-        visible_x, visible_y = np.nonzero(core.g.engine.game_map.visible)
-        for tile_x, tile_y in zip(visible_x, visible_y):
-            for entity in core.g.engine.game_map.get_all_visible_entities(tile_x, tile_y):
-                if entity in core.g.engine.game_map.dangerous_actors:
-                    return entity.name
+        game_map = core.g.engine.game_map
+        for entity in game_map.get_nearest_entities(self.entity.x, self.entity.y, visible_only=True,
+                                                    predicate=lambda entity: entity in game_map.dangerous_actors):
+            return entity.name
 
     def path_isvalid(self):
         """Helper tool to find out whether a path is valid. This is important as teleportation
@@ -461,7 +459,7 @@ class ExploreAction(Action):
         if core.g.engine.player.x == self.path[0][0] and core.g.engine.player.y == self.path[0][1]:
             return False
 
-        if not core.g.engine.game_map.tiles['walkable'][self.path[0][0], self.path[0][1]]:
+        if not core.g.engine.game_map.is_walkable(self.path[0][0], self.path[0][1]):
             return False
 
         next_x = abs(self.entity.x - self.path[0][0])
@@ -505,15 +503,8 @@ class ExploreAction(Action):
 
             # Try simple A*
             if closest_coord:
-                cost = np.array(core.g.engine.game_map.accessible, dtype=np.int8)
-
-                # Create a graph from the cost array and pass that graph to a new pathfinder.
-                graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-                pathfinder = tcod.path.Pathfinder(graph)
-                pathfinder.add_root((core.g.engine.player.x, core.g.engine.player.y))  # Start position.
-
-                # Compute the path to the destination and remove the starting point.
-                self.path: List[List[int]] = pathfinder.path_to(closest_coord)[1:].tolist()
+                # Only accessible tiles can be walked over from the player's location
+                self.path = core.g.engine.game_map.navigation.path("open", (player.x, player.y), closest_coord)
                 if not self.path:
                     core.g.engine.message_log.add_message("You cannot explore the remaining tiles.",
                                                           config.colour.yellow)
@@ -544,12 +535,11 @@ class TakeStairsAction(Action):
 
     def enemy_in_fov(self):
         """Checks if there in an enemy in player FOV which will interrupt the pathing to the stairs."""
-        visible_x, visible_y = np.nonzero(core.g.engine.game_map.visible)
-        for tile_x, tile_y in zip(visible_x, visible_y):
-            for entity in core.g.engine.game_map.get_all_visible_entities(tile_x, tile_y):
-                if entity in core.g.engine.game_map.dangerous_actors:
-                    core.g.engine.message_log.add_message(f"You spot a {entity.name} and stop exploring.",
-                                                          config.colour.yellow)
+        game_map = core.g.engine.game_map
+        for entity in game_map.get_nearest_entities(self.entity.x, self.entity.y, k=None, visible_only=True,
+                                                    predicate=lambda entity: entity in game_map.dangerous_actors):
+            core.g.engine.message_log.add_message(f"You spot a {entity.name} and stop exploring.",
+                                                  config.colour.yellow)
 
     def path_isvalid(self):
         """Helper tool to find out whether a path is valid. This is important as teleportation
@@ -557,7 +547,7 @@ class TakeStairsAction(Action):
         if core.g.engine.player.x == self.path[0][0] and core.g.engine.player.y == self.path[0][1]:
             return False
 
-        if not core.g.engine.game_map.tiles['walkable'][self.path[0][0], self.path[0][1]]:
+        if not core.g.engine.game_map.is_walkable(self.path[0][0], self.path[0][1]):
             return False
 
         next_x = abs(self.entity.x - self.path[0][0])
@@ -580,15 +570,8 @@ class TakeStairsAction(Action):
             self.path.pop(0)
             return "continuous"
         else:
-            cost = np.array(core.g.engine.game_map.accessible, dtype=np.int8)
-
-            # Create a graph from the cost array and pass that graph to a new pathfinder.
-            graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-            pathfinder = tcod.path.Pathfinder(graph)
-            pathfinder.add_root((core.g.engine.player.x, core.g.engine.player.y))  # Start position.
-
-            # Compute the path to the destination and remove the starting point.
-            self.path: List[List[int]] = pathfinder.path_to(core.g.engine.game_map.downstairs_location)[1:].tolist()
+            self.path = core.g.engine.game_map.navigation.path(
+                "open", (player.x, player.y), core.g.engine.game_map.downstairs_location)
             if core.g.engine.player.x == core.g.engine.game_map.downstairs_location[0] and \
                     core.g.engine.player.y == core.g.engine.game_map.downstairs_location[1]:
                 return None
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import logging
+from typing import Optional, TYPE_CHECKING
 
 import tcod
 from tcod.map import compute_fov
 
 import core.input_handlers
+import parts.ai
+from core.scheduler import ActivityScheduler, TurnQueue, action_time
 from config.exceptions import Impossible
 from gui.message_log import MessageLog
+from utils.random_utils import RandomStreams
 
 if TYPE_CHECKING:
     from parts.entity import Actor
@@ -18,13 +22,38 @@ class Engine:
     game_map: SimpleGameMap
     game_world: GameWorld
 
-    def __init__(self, player: Actor):
+    def __init__(self, player: Actor, seed: Optional[int] = None):
         self.turn_number: int = 0
+        self.time = 0  # Game time, which advances by the time taken by each of the player's actions
+        self.turn_queue = TurnQueue()  # Active monsters, by the time of their next action
+        self.rng = RandomStreams(seed)
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
         self.player = player
         self.last_actor: Actor
         self.convos: dict[str, core.input_handlers.ConversationEventHandler] = {}
+        self.chase_field: Optional[parts.ai.ChaseField] = None  # Shared by monsters chasing the player this turn
+        self.perception: Optional[parts.ai.Perception] = None  # What the active monsters perceive this turn
+        self.scheduler = ActivityScheduler()  # Chooses the monsters which act each turn
+
+    def get_chase_field(self) -> parts.ai.ChaseField:
+        """
+        Return the field which monsters follow to chase the player this turn. It is only computed once the first monster
+        needs it, and only once per turn however many monsters are chasing.
+        """
+        if self.chase_field is None:
+            self.chase_field = parts.ai.ChaseField(self.game_map, self.player.x, self.player.y)
+        return self.chase_field
+
+    def perceive(self, actor: Actor) -> parts.ai.Sense:
+        """
+        Return what a monster perceives of the player, from this turn's perception phase if the monster took part in it
+        and has not moved since, or else worked out for the monster alone.
+        """
+        sense = self.perception.sense(actor) if self.perception else None
+        if sense is None:
+            sense = parts.ai.Perception(self.game_map, self.player, [actor]).sense(actor)
+        return sense
 
     def handle_enemy_turns(self) -> None:
         # When enemy turn starts, first tick all player abilities/mutations
@@ -36,19 +65,49 @@ class Engine:
             for mutation in self.player.mutations:
                 if mutation.cooldown > 0:
                     mutation.tick()
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
+        # Monsters act until they have caught up with the time taken by the player's action. Monsters which have just
+        # become active act straight away, while the rest act whenever their next action is due.
+        self.time += action_time(self.player.speed)
+        active, wanderers = self.scheduler.plan_turn(self)
+        # Effects wear off on every monster each turn, whether or not it takes a turn itself
+        for entity in self.game_map.actors:
+            if entity is not self.player and entity.ai and entity.active_effects:
                 entity.trigger_active_effects()
+        for entity in active:
+            if entity not in self.turn_queue:
+                self.turn_queue.schedule(entity, self.time)
+        # Perception phase: what every active monster perceives of the player is worked out at once, before any act
+        active = [entity for entity in active if entity in self.game_map.actors]
+        self.perception = parts.ai.Perception(self.game_map, self.player, active)
+        active = set(active)
+        while due := self.turn_queue.pop_due(self.time):
+            time, entity = due
+            # Monsters may have left the active tier, or been killed during the turn by those acting before them
+            if entity not in active or not entity.ai or entity not in self.game_map.actors:
+                continue
+            try:
+                entity.ai.perform()
+            except Impossible:
+                pass  # Ignore impossible action exceptions from AI.
+            self.scheduler.after_turn(entity)
+            self.turn_queue.schedule(entity, time + action_time(entity.speed))
+        for entity in wanderers:
+            if isinstance(entity.ai, parts.ai.HostileEnemy) and entity in self.game_map.actors:
                 try:
-                    entity.ai.perform()
+                    entity.ai.wander()
                 except Impossible:
-                    pass  # Ignore impossible action exceptions from AI.
+                    pass
+        self.chase_field = None  # The player moves next, so the field and perception are out of date
+        self.perception = None
         self.turn_number += 1
 
+        if logging.DEBUG >= logging.root.level:
+            self.game_map.check_entity_index()
+
     def update_fov(self) -> None:
         """Recompute the visible area based on the players point of view."""
         self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
+            self.game_map.transparent,
             (self.player.x, self.player.y),
             radius=6, algorithm=tcod.FOV_BASIC
         )
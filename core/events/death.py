@@ -71,7 +71,8 @@ class GameOverEventHandler(EventHandler):
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> BaseEventHandler:
         if event.sym == tcod.event.K_ESCAPE:
-            from config.setup_game import MainMenu
+            from config.setup_game import close_game, MainMenu
+            close_game()
             return MainMenu()
         elif event.sym == tcod.event.K_m:
             return DeadHistoryViewer()
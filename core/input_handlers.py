@@ -12,6 +12,7 @@ import config.inputs
 import core.action
 import core.actions
 import core.g
+import maps.tiles
 import parts.inventory
 from config.exceptions import Impossible
 from core.actions import Action
@@ -245,7 +246,7 @@ class MainGameEventHandler(EventHandler):
             # Failsafe OOB check
             if not core.g.engine.game_map.in_bounds(player.x + dx, player.y + dy):
                 core.g.engine.message_log.add_message("That way is blocked.", config.colour.impossible)
-            elif core.g.engine.game_map.tiles[player.x + dx, player.y + dy]['name'] == 'hole':
+            elif core.g.engine.game_map.tile_has_flag(player.x + dx, player.y + dy, maps.tiles.TileFlag.Hole):
                 return HoleJumpEventHandler()
             else:
                 action = core.actions.BumpAction(player, dx, dy)
@@ -375,11 +376,12 @@ class EscMenuEventHandler(AskUserEventHandler):
                       alignment=tcod.constants.LEFT, fg=tcod.white)
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
-        from config.setup_game import save_game, MainMenu
+        from config.setup_game import close_game, save_game, MainMenu
         key = event.sym
 
         if key == tcod.event.K_s:
             save_game(Path("savegames/savegame.sav"))
+            close_game()
             return MainMenu()
         elif key == tcod.event.K_h:
             return HelpScreenEventHandler()
@@ -1123,17 +1125,17 @@ class LookHandler(SelectIndexHandler):
         # Get necessary info at the specified tile
         tile = core.g.engine.game_map.get_tile_at_explored_location(x_pos, y_pos)
         visible = core.g.engine.game_map.visible[x_pos, y_pos]
-        if tile:
+        if tile is not None:
             # Make a dictionary containing all necessary content
             tile_content = {}
             tile_content['name'] = get_clean_name(tile)
-            tile_content['description'] = ''.join(tile[5])
+            tile_content['description'] = str(maps.tiles.descriptions[tile])
             tile_content['footer'] = 'FLOOR TILE'
             tile_content['footer_colour'] = tcod.grey
             if visible:
-                tile_content['colour'] = list(tile[4][1])
+                tile_content['colour'] = list(maps.tiles.light[tile]['fg'])
             else:
-                tile_content['colour'] = list(tile[4][1])
+                tile_content['colour'] = list(maps.tiles.light[tile]['fg'])
 
             # Look box size
             width = console.width // 4 + 2
@@ -7,6 +7,7 @@ import config.colour
 import core.engine
 import core.render_functions
 import maps.game_map
+import maps.tiles
 from maps.tiles import SHROUD
 
 
@@ -21,7 +22,7 @@ from maps.tiles import SHROUD
 
 
 def render_map(console: tcod.Console, gamemap: maps.game_map.SimpleGameMap) -> None:
-    console.tiles_rgb[0:gamemap.width, 0:gamemap.height] = gamemap.tiles["dark"]
+    console.tiles_rgb[0:gamemap.width, 0:gamemap.height] = maps.tiles.dark[gamemap.tiles]
     # light = tile_graphics[gamemap.tiles]
     #
     # # Apply effects to create a darkened map of tile graphics.
@@ -34,7 +35,7 @@ def render_map(console: tcod.Console, gamemap: maps.game_map.SimpleGameMap) -> N
     # Otherwise, the default graphic is "SHROUD".
     console.tiles_rgb[0:gamemap.width, 0:gamemap.height] = np.select(
         condlist=[gamemap.visible, gamemap.explored],
-        choicelist=[gamemap.tiles["light"], gamemap.tiles["dark"]],
+        choicelist=[maps.tiles.light[gamemap.tiles], maps.tiles.dark[gamemap.tiles]],
         default=SHROUD
     )
 
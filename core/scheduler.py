@@ -0,0 +1,137 @@
+"""
+Deciding which monsters act on each turn, so that the cost of a turn depends on how much is happening around the
+player rather than on how many monsters live on the floor. Monsters fall into three tiers:
+
+- Active monsters, those near the player or still busy with something (chasing the player, confused or under an
+  effect), run their full AI every turn.
+- Distant monsters only wander, and only on one turn in every distant_interval, a different share of them each turn.
+  Monsters are shared out by the order they were added to the map in, so each gets its turn however they move.
+- Stationary and passive monsters do nothing at all until the player is right next to them or an effect is upon them.
+
+Active monsters then take their actions in order of game time from a TurnQueue, so that faster monsters act more often.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+import parts.ai
+
+if TYPE_CHECKING:
+    from core.engine import Engine
+    from parts.entity import Actor
+
+# Monsters within this many tiles (Chebyshev distance) of the player are active. This is further than the player can
+# see, so that monsters are already up to date by the time they come into view.
+active_radius = 10
+# Distant monsters take a turn once every this many turns
+distant_interval = 4
+
+# AIs which never move, and so have nothing to do away from the player
+stationary_ais = (parts.ai.HostileStationary, parts.ai.PassiveStationary, parts.ai.NPC)
+
+# Time taken by a single action of an actor at normal speed (100). Faster actors take proportionally less time per action.
+action_length = 100
+
+
+def action_time(speed: int) -> int:
+    """Return the time taken by a single action of an actor with the given speed."""
+    return action_length * 100 // max(speed, 1)
+
+
+class ActivityScheduler:
+    """Chooses the monsters which take a turn, remembering those which have business away from the player."""
+
+    def __init__(self):
+        self.awake: Set[Actor] = set()  # Active monsters which may have since left active_radius
+
+    def plan_turn(self, engine: Engine) -> Tuple[List[Actor], List[Actor]]:
+        """Return the monsters which take a full turn, and the distant monsters which wander, on this turn."""
+        game_map = engine.game_map
+        player = engine.player
+        active = []
+        for actor in game_map.get_entities_within(player.x, player.y, active_radius, metric="chebyshev",
+                                                  predicate=lambda entity: entity in game_map.actors):
+            if actor is player or not actor.ai:
+                continue
+            if isinstance(actor.ai, stationary_ais) and not actor.active_effects:
+                if max(abs(actor.x - player.x), abs(actor.y - player.y)) > 1:
+                    continue
+            active.append(actor)
+
+        nearby = set(active)
+        self.awake = {actor for actor in self.awake if actor in game_map.actors and actor.ai}
+        active.extend(sorted((actor for actor in self.awake if actor not in nearby),
+                             key=lambda actor: actor.spawn_number))
+
+        wanderers = []
+        share = engine.turn_number % distant_interval
+        for actor in game_map.dangerous_actors:
+            if actor.spawn_number % distant_interval != share:
+                continue
+            if actor in nearby or actor in self.awake or not actor.ai:
+                continue
+            if self.is_busy(actor):
+                active.append(actor)
+            elif isinstance(actor.ai, parts.ai.HostileEnemy):
+                wanderers.append(actor)
+        return active, wanderers
+
+    def after_turn(self, actor: Actor) -> None:
+        """Keep a monster active after its full turn for as long as it is busy, wherever it goes."""
+        if self.is_busy(actor):
+            self.awake.add(actor)
+        else:
+            self.awake.discard(actor)
+
+    @staticmethod
+    def is_busy(actor: Actor) -> bool:
+        """Return True if a monster has something to do besides wait or wander."""
+        return bool(actor.active_effects or getattr(actor.ai, "path", None) or getattr(actor.ai, "last_seen", None)
+                    or isinstance(actor.ai, parts.ai.ConfusedEnemy))
+
+
+class TurnQueue:
+    """
+    Actors waiting to take their next action, in a heap ordered by the time of that action. Actors due at the same time
+    act in the order they were queued in, so the order of turns is deterministic. Rescheduling or removing an actor
+    leaves its old entry in the heap, which is skipped when it comes up.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[int, int, Actor]] = []
+        self.queued: Dict[Actor, int] = {}  # Time of the next action of each queued actor
+        self.sequence = 0  # Number of actors queued so far, which breaks ties between actors due at the same time
+
+    def __contains__(self, actor: Actor) -> bool:
+        return actor in self.queued
+
+    def schedule(self, actor: Actor, time: int) -> None:
+        """Queue an actor to act at a time, replacing any action it was already queued for."""
+        self.queued[actor] = time
+        heapq.heappush(self.heap, (time, self.sequence, actor))
+        self.sequence += 1
+
+    def remove(self, actor: Actor) -> None:
+        """Take an actor out of the queue, e.g. once it has died."""
+        if self.queued.pop(actor, None) is None:
+            return
+        # Drop the entries of actors no longer queued once they make up most of the heap, so that the heap does not
+        # keep them alive
+        if len(self.heap) > 2 * len(self.queued):
+            self.heap = [entry for entry in self.heap if self.queued.get(entry[2]) == entry[0]]
+            heapq.heapify(self.heap)
+
+    def clear(self) -> None:
+        """Take every actor out of the queue, e.g. when leaving a floor."""
+        self.heap.clear()
+        self.queued.clear()
+
+    def pop_due(self, now: int) -> Optional[Tuple[int, Actor]]:
+        """Remove and return the time and actor of the next action due no later than now, or None if there is none."""
+        while self.heap and self.heap[0][0] <= now:
+            time, _, actor = heapq.heappop(self.heap)
+            if self.queued.get(actor) == time:
+                del self.queued[actor]
+                return time, actor
+        return None
@@ -1,10 +1,9 @@
-import json
-
 from typing import List
 
 import parts.consumable
 import parts.equippable
 from config.exceptions import DataLoadError
+from data.prototypes import PrototypeRegistry
 from parts.entity import Item
 from parts.equipment_types import EquipmentType
 from parts.equippable import Equippable
@@ -12,21 +11,19 @@ import parts.effects
 
 
 def create_item_from_json(path: str, request: str) -> Item:
-    f = open(path, 'r', encoding='utf-8')
-    item_dict = json.load(f)
+    """Return a new item, cloned from the prototype built from its json template."""
+    return item_prototypes.get(path, request).clone()
 
-    for i in range(len(item_dict)):
-        if request in item_dict[i]:
-            data = item_dict[i][request]
 
-            # Determine item type
-            if 'equipment_type' in data:
-                item = create_equipment(data)
-            elif 'consumable' in data:
-                item = create_consumable(data)
-            else:
-                raise DataLoadError
-            return item
+def create_item(data: dict) -> Item:
+    # Determine item type
+    if 'equipment_type' in data:
+        item = create_equipment(data)
+    elif 'consumable' in data:
+        item = create_consumable(data)
+    else:
+        raise DataLoadError
+    return item
 
 
 def create_equipment(data) -> Item:
@@ -128,6 +125,10 @@ def create_consumable(data: dict) -> Item:
     )
     return item
 
+
+item_prototypes = PrototypeRegistry(create_item)
+
+
 # def steel_cuirass(x, y):
 #     equippable_component = Equippable(EquipmentSlots.Torso, armour_bonus=3)
 #     return Entity(x, y, ']', tcod.white, 'Steel Cuirass',
@@ -1,7 +1,6 @@
-import json
-
 import parts.mutations
 import parts.ai
+from data.prototypes import PrototypeRegistry
 from parts.entity import Actor, Corpse
 from parts.equipment import Equipment
 from parts.fighter import Fighter
@@ -10,14 +9,8 @@ from parts.level import Level
 
 
 def create_monster_from_json(path: str, request: str) -> Actor:
-    f = open(path)
-    monster_dict = json.load(f)
-
-    for i in range(len(monster_dict)):
-        if request in monster_dict[i]:
-            data = monster_dict[i][request]
-            monster = create_monster(data)
-            return monster
+    """Return a new monster, cloned from the prototype built from its json template."""
+    return monster_prototypes.get(path, request).clone()
 
 
 def create_monster(data: dict) -> Actor:
@@ -72,7 +65,8 @@ def create_monster(data: dict) -> Actor:
             level_up_base=data['level']['level_up_base'],
             xp_given=data['level']['xp_given']
         ),
-        description=data['description']
+        description=data['description'],
+        speed=data.get('speed', 100)
     )
 
     if 'abilities' in data:
@@ -89,3 +83,6 @@ def create_monster(data: dict) -> Actor:
             # if mutation == "Entomb":
             monster.mutations.append(mutation)
     return monster
+
+
+monster_prototypes = PrototypeRegistry(create_monster)
@@ -1,17 +1,10 @@
-import json
-
+from data.prototypes import PrototypeRegistry
 from parts.entity import StaticObject
 
 
 def create_static_object_from_json(path: str, request: str) -> StaticObject:
-    f = open(path, 'r', encoding='utf-8')
-    object_dict = json.load(f)
-
-    for i in range(len(object_dict)):
-        if request in object_dict[i]:
-            data = object_dict[i][request]
-            static_object = create_static_object(data)
-            return static_object
+    """Return a new static object, cloned from the prototype built from its json template."""
+    return static_object_prototypes.get(path, request).clone()
 
 
 def create_static_object(data) -> StaticObject:
@@ -23,3 +16,6 @@ def create_static_object(data) -> StaticObject:
         description=data['description']
     )
     return static_object
+
+
+static_object_prototypes = PrototypeRegistry(create_static_object)
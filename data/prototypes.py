@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import json
+from typing import Callable, Dict, Tuple, TYPE_CHECKING
+
+from config.exceptions import DataLoadError
+
+if TYPE_CHECKING:
+    from parts.entity import Entity
+
+
+class PrototypeRegistry:
+    """
+    Builds each entity template described within the json data files once per process. New entities are then made
+    by cloning the stored prototype, rather than re-reading the data file and rebuilding the entity for every spawn.
+    """
+
+    def __init__(self, build: Callable[[dict], Entity]):
+        self.build = build
+        self.files: Dict[str, list] = {}
+        self.prototypes: Dict[Tuple[str, str], Entity] = {}
+
+    def get(self, path: str, request: str) -> Entity:
+        """Return the shared prototype for a request. It must be cloned (e.g. via spawn) before being modified."""
+        key = (path, request)
+        if key not in self.prototypes:
+            if path not in self.files:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.files[path] = json.load(f)
+            for entry in self.files[path]:
+                if request in entry:
+                    self.prototypes[key] = self.build(entry[request])
+                    self.prototypes[key].prototype = key
+                    break
+            else:
+                raise DataLoadError(f"Could not find '{request}' within {path}.")
+        return self.prototypes[key]
@@ -0,0 +1,42 @@
+import json
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class SpawnTable:
+    """
+    The weighted spawn chances of every floor within a spawn table json file, compiled once into cumulative-weight
+    arrays so that any number of entities may be drawn in a single call.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            table = json.load(f)[0]
+
+        self.floors: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for floor, entries in table.items():
+            names = np.array(list(entries.keys()))
+            types = np.array([value[0] for value in entries.values()])
+            cumulative_weights = np.cumsum([value[1] for value in entries.values()], dtype=np.float64)
+            self.floors[int(floor)] = (names, types, cumulative_weights)
+
+        # Floors beyond the deepest defined floor keep spawning from the deepest table
+        self.min_floor = min(self.floors)
+        self.max_floor = max(self.floors)
+
+    def sample(self, floor: int, number: int, rng: np.random.Generator) -> Tuple[List[str], List[str]]:
+        """Return the names and types of a number of entities drawn at random for the given floor."""
+        names, types, cumulative_weights = self.floors[max(self.min_floor, min(floor, self.max_floor))]
+        index = np.searchsorted(cumulative_weights, rng.random(number) * cumulative_weights[-1], side='right')
+        return names[index].tolist(), types[index].tolist()
+
+
+spawn_tables: Dict[str, SpawnTable] = {}
+
+
+def get_spawn_table(path: str) -> SpawnTable:
+    """Return the compiled spawn table for a json file, loading it the first time that it is requested."""
+    if path not in spawn_tables:
+        spawn_tables[path] = SpawnTable(path)
+    return spawn_tables[path]
@@ -0,0 +1,130 @@
+"""
+Which tiles of a map the player can walk to. Walkable tiles are labelled by the connected region they belong to, and
+the player can access every tile of their own region other than those with a static object upon them. Regions are kept
+up to date as single tiles become walkable or blocked, merging regions which a new tile joins and splitting a region
+which a blocked tile cuts in two, so that the map only has to be labelled from scratch when it is first needed.
+"""
+from __future__ import annotations
+
+from typing import Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from scipy import ndimage
+
+if TYPE_CHECKING:
+    from maps.game_map import SimpleGameMap
+
+# Tiles are connected to all 8 of their neighbours, as actors can move diagonally
+connectivity = np.ones((3, 3), dtype=bool)
+
+
+class AccessibilityMap:
+    """
+    The connected regions of walkable tiles of a map. Labels are merged with a union-find over the labels rather than
+    by relabelling tiles, so a tile's region is the root of its label within parents.
+    """
+
+    def __init__(self, gamemap: SimpleGameMap):
+        self.gamemap = gamemap
+        self.labels: Optional[np.ndarray] = None  # Label of the region each tile belongs to, 0 for blocked tiles
+        self.parents = np.zeros(1, dtype=np.int32)  # Label each label was merged into, or itself for a root label
+        self.cached_region = 0
+        self.cached_mask: Optional[np.ndarray] = None
+
+    def invalidate(self) -> None:
+        """Forget every region, so that they are labelled again from the map's tiles when next needed."""
+        self.labels = None
+        self.cached_mask = None
+
+    def objects_changed(self) -> None:
+        """Forget the accessible tiles after a static object was added or removed, without relabelling regions."""
+        self.cached_mask = None
+
+    def rebuild(self) -> None:
+        """Label every region of walkable tiles from scratch."""
+        labels, count = ndimage.label(self.gamemap.walkable, structure=connectivity)
+        self.labels = np.asfortranarray(labels, dtype=np.int32)
+        self.parents = np.arange(count + 1, dtype=np.int32)
+        self.cached_mask = None
+
+    def find(self, label: int) -> int:
+        """Return the root label of the region a label belongs to."""
+        parents = self.parents
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return int(label)
+
+    def roots(self) -> np.ndarray:
+        """Return the root label of every label, flattening the union-find so that later lookups are direct."""
+        roots = self.parents
+        while True:
+            next_roots = roots[roots]
+            if np.array_equal(next_roots, roots):
+                break
+            roots = next_roots
+        self.parents = roots
+        return roots
+
+    def region(self, x: int, y: int) -> int:
+        """Return the root label of the region of the tile at x, y, or 0 if the tile is blocked."""
+        if self.labels is None:
+            self.rebuild()
+        return self.find(self.labels[x, y])
+
+    def connected(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """Return True if both tiles are walkable and an actor could walk between them."""
+        region = self.region(*start)
+        return region != 0 and region == self.region(*end)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """
+        Tiles the player can walk to from their current location, other than those with a static object upon them.
+        The mask is shared until the map changes, so must not be modified.
+        """
+        player = self.gamemap.engine.player
+        region = self.region(player.x, player.y)
+        if self.cached_mask is None or region != self.cached_region:
+            if region:
+                mask = self.roots()[self.labels] == region
+            else:
+                mask = np.zeros((self.gamemap.width, self.gamemap.height), dtype=bool, order="F")
+            for entity in self.gamemap.static_objects:
+                mask[entity.x, entity.y] = False
+            self.cached_region, self.cached_mask = region, mask
+        return self.cached_mask
+
+    def set_walkable(self, x: int, y: int, walkable: bool) -> None:
+        """Update the regions after the tile at x, y became walkable or blocked."""
+        if self.labels is None:
+            return  # Labelled from the map's tiles when next needed
+        if walkable == bool(self.labels[x, y]):
+            return
+        self.cached_mask = None
+        window = (slice(max(x - 1, 0), x + 2), slice(max(y - 1, 0), y + 2))
+
+        if walkable:
+            # Join the regions of every walkable neighbour, or start a new region if there are none
+            neighbours = {self.find(label) for label in np.unique(self.labels[window]) if label}
+            if neighbours:
+                region = min(neighbours)
+                for other in neighbours:
+                    self.parents[other] = region
+            else:
+                region = len(self.parents)
+                self.parents = np.append(self.parents, np.int32(region))
+            self.labels[x, y] = region
+            return
+
+        region = self.find(self.labels[x, y])
+        self.labels[x, y] = 0
+        # The region can only have been split if the walkable neighbours of the tile are no longer connected to each
+        # other around it. If they are, nothing else changes.
+        if ndimage.label(self.labels[window] != 0, structure=connectivity)[1] <= 1:
+            return
+        cells = self.roots()[self.labels] == region
+        pieces, count = ndimage.label(cells, structure=connectivity)
+        first = len(self.parents)
+        self.labels[cells] = pieces[cells] + (first - 1)
+        self.parents = np.concatenate([self.parents, np.arange(first, first + count, dtype=np.int32)])
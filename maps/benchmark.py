@@ -0,0 +1,190 @@
+"""
+Headless benchmarking of map generation. Generates floors for a range of depths and seeds without opening a window,
+times every stage of generation and reports statistics about the floors produced as JSON, so that generators can be
+compared between versions. Run from the repository root with, e.g.:
+
+    python -m maps.benchmark --depths 1 2 3 4 5 --runs 50 --output bench.json
+    python -m maps.benchmark --cave-sizes 80x43 400x400
+    python -m maps.benchmark --depths 2 --runs 5 --allocations
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import ndimage
+
+from config.setup_game import first_floor_settings
+from core.engine import Engine
+from data.monster_factory import create_monster_from_json
+from maps.game_map import GameWorld, SimpleGameMap
+from maps.pipeline import AllocationHook, RetryHook, StageHook, WallClockHook
+from maps.procgen import add_caves
+
+benchmark_sizes = [
+    (80, 43),
+    (400, 400)
+]
+
+percentiles = [50, 90, 99]
+
+
+def benchmark_caves(width: int, height: int, seeds: List[int], smoothing: int = 2, p: int = 45) -> List[float]:
+    """Return the wall-clock time in seconds taken by add_caves for a run with each of the given seeds."""
+    timings = []
+    for seed in seeds:
+        dungeon = SimpleGameMap(Engine(player=None, seed=seed), width, height)
+        start = time.perf_counter()
+        add_caves(dungeon, smoothing=smoothing, p=p)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def generate_floor(depth: int, seed: int, allocations: bool = False
+                   ) -> Tuple[SimpleGameMap, Dict[str, float], Dict[str, int], Dict[str, int]]:
+    """
+    Generate the floor at a depth of a new game with the given seed, returning it with its stage timings and the number
+    of times each stage failed and was retried. The peak memory allocated by each stage is also returned if allocations
+    is set, at the cost of much slower generation.
+    """
+    engine = Engine(player=create_monster_from_json('data/monsters/player.json', 'player'), seed=seed)
+    engine.game_world = GameWorld(engine=engine, pregenerate=False, **first_floor_settings)
+    for floor in range(depth):
+        engine.game_world.advance_floor()
+
+    timings: Dict[str, float] = {}
+    peaks: Dict[str, int] = {}
+    retries: Dict[str, int] = {}
+    hooks: List[StageHook] = [WallClockHook(timings), RetryHook(retries)]
+    if allocations:
+        hooks.append(AllocationHook(peaks))
+    start = time.perf_counter()
+    dungeon = engine.game_world.generate_seeded_dungeon(hooks)
+    timings["total"] = time.perf_counter() - start
+    return dungeon, timings, peaks, retries
+
+
+def floor_statistics(dungeon: SimpleGameMap, min_stairs_distance: int = 20) -> Dict[str, float]:
+    """Return measurements of the shape and connectivity of a generated floor."""
+    walkable = dungeon.walkable
+    number_of_walkable = max(int(walkable.sum()), 1)
+    components, number_of_components = ndimage.label(walkable, structure=np.ones((3, 3)))
+    component_sizes = np.bincount(components.ravel())[1:]
+    reachable = dungeon.accessible
+    stairs_distance = int(dungeon.distance_from_start[dungeon.downstairs_location])
+
+    return {
+        "walkable_fraction": float(walkable.mean()),
+        "reachable_fraction": float(reachable.sum() / number_of_walkable),
+        "components": int(number_of_components),
+        "largest_component_fraction": float(component_sizes.max(initial=0) / number_of_walkable),
+        "stairs_distance": stairs_distance,
+        "stairs_fallback": stairs_distance <= min_stairs_distance,
+        "entities": len(dungeon.entities) - 1
+    }
+
+
+def summarise(values: List[float], scale: float = 1.0) -> Dict[str, float]:
+    """Return the mean, minimum, maximum and percentiles of a list of measurements, multiplied by scale."""
+    values = np.asarray(values, dtype=np.float64) * scale
+    summary = {"mean": float(values.mean()), "min": float(values.min()), "max": float(values.max())}
+    for percentile in percentiles:
+        summary[f"p{percentile}"] = float(np.percentile(values, percentile))
+    return summary
+
+
+def benchmark_floors(depths: List[int], seeds: List[int], raw: bool = False,
+                     allocations: bool = False) -> Dict[str, dict]:
+    """
+    Generate a floor at every depth for every seed, returning a report of the timings and statistics per depth, and of
+    the peak memory allocated by each stage if allocations is set.
+    """
+    report = {}
+    for depth in depths:
+        timings: Dict[str, List[float]] = {}
+        peaks: Dict[str, List[int]] = {}
+        statistics: Dict[str, list] = {}
+        retries: Dict[str, int] = {}
+        floors = []
+        for seed in seeds:
+            dungeon, floor_timings, floor_peaks, floor_retries = generate_floor(depth, seed, allocations)
+            measurements = floor_statistics(dungeon)
+            for stage, seconds in floor_timings.items():
+                timings.setdefault(stage, []).append(seconds)
+            for stage, size in floor_peaks.items():
+                peaks.setdefault(stage, []).append(size)
+            for stage, count in floor_retries.items():
+                retries[stage] = retries.get(stage, 0) + count
+            for name, value in measurements.items():
+                statistics.setdefault(name, []).append(value)
+            if raw:
+                floor_timings = {stage: seconds * 1000 for stage, seconds in floor_timings.items()}
+                floors.append({"seed": seed, "timings_ms": floor_timings, "retries": floor_retries, **measurements})
+
+        report[str(depth)] = {
+            "floors": len(seeds),
+            "timings_ms": {stage: summarise(seconds, 1000) for stage, seconds in timings.items()},
+            # Floors without a tile far enough away for the stairs put them on the furthest tile rather than failing, so
+            # these are counted apart from the retries, which are counted per failed stage
+            "stairs_fallbacks": int(sum(statistics.pop("stairs_fallback"))),
+            "retries": {"total": sum(retries.values()), "stages": retries},
+            **{name: summarise(values) for name, values in statistics.items()}
+        }
+        if allocations:
+            report[str(depth)]["peak_allocation_kib"] = {stage: summarise(sizes, 1 / 1024)
+                                                         for stage, sizes in peaks.items()}
+        if raw:
+            report[str(depth)]["raw"] = floors
+    return report
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    width, height = size.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark map generation without opening a window.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 2, 3, 4, 5],
+                        help="floor numbers to generate (default: 1 to 5)")
+    parser.add_argument("--runs", type=int, default=20, help="number of seeds to generate each depth with")
+    parser.add_argument("--seed", type=int, default=0, help="first seed, later runs use the following seeds")
+    parser.add_argument("--cave-sizes", type=parse_size, nargs="*", metavar="WxH",
+                        help="time add_caves alone at these map sizes instead of generating whole floors "
+                             f"(default sizes: {' '.join(f'{w}x{h}' for w, h in benchmark_sizes)})")
+    parser.add_argument("--raw", action="store_true", help="include the measurements of every floor")
+    parser.add_argument("--allocations", action="store_true",
+                        help="also record the peak memory allocated by each stage (slows generation down)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "runs": args.runs,
+        "seed": args.seed
+    }
+    seeds = list(range(args.seed, args.seed + args.runs))
+    if args.cave_sizes is not None:
+        report["add_caves_ms"] = {
+            f"{width}x{height}": summarise(benchmark_caves(width, height, seeds), 1000)
+            for width, height in args.cave_sizes or benchmark_sizes
+        }
+    else:
+        report["depths"] = benchmark_floors(args.depths, seeds, raw=args.raw, allocations=args.allocations)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
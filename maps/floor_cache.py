@@ -0,0 +1,146 @@
+"""
+An on-disk cache of generated floors. Every floor is fully determined by the world seed, the floor number and the
+generation settings, so a floor which has been generated once can be rebuilt from a compact record of its tiles and
+spawned entities instead of running the map generator again.
+
+Cache files are named after a hash of the settings they were generated with. Bump floor_cache_version (or delete the
+cache directory) whenever a change to the generator or data files alters the floors produced from the same settings.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+import maps.tiles
+from data.item_factory import item_prototypes
+from data.monster_factory import monster_prototypes
+from data.object_factory import static_object_prototypes
+from data.prototypes import PrototypeRegistry
+from maps.game_map import SimpleGameMap
+from parts.entity import Actor, Item, StaticObject
+
+if TYPE_CHECKING:
+    from core.engine import Engine
+    from parts.entity import Entity
+
+floor_cache_version = 5
+
+# The ID of every tile type, by name. Tiles are cached by name so that cached floors survive changes to the tile IDs.
+tile_ids: Dict[str, int] = {str(name): tile for tile, name in enumerate(maps.tiles.names)}
+
+# The prototype registries which spawned entities are rebuilt from, in the order their indices are stored
+registries: List[Tuple[type, PrototypeRegistry]] = [
+    (Actor, monster_prototypes),
+    (Item, item_prototypes),
+    (StaticObject, static_object_prototypes)
+]
+
+
+def floor_key(settings: dict) -> str:
+    """Return the cache key for the floor generated from a GameWorld's settings."""
+    settings = dict(settings, version=floor_cache_version)
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FloorCache:
+    """
+    A directory of generated floors, each stored as a compressed numpy archive holding the tile, tunnel and room arrays
+    of the floor, along with a record of each spawned entity and the player's start location.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key: str, engine: Engine) -> Optional[SimpleGameMap]:
+        """Rebuild the cached floor for a key, placing the engine's player upon it. Returns None on a cache miss."""
+        try:
+            with np.load(self.path(key), allow_pickle=False) as archive:
+                data = dict(archive)
+        except FileNotFoundError:
+            return None
+
+        width, height = data['tile_index'].shape
+        dungeon = SimpleGameMap(engine, width, height, entities=[engine.player])
+        palette = np.array([tile_ids[name] for name in data['tile_names']], dtype=np.uint8)
+        dungeon.tiles = np.asfortranarray(palette[data['tile_index']])
+        dungeon.tunnel[:] = data['tunnel']
+        dungeon.tiles_changed()
+
+        room_sizes = data['room_sizes']
+        if len(room_sizes):
+            rooms_x = np.split(data['rooms_x'], np.cumsum(room_sizes[:, 0])[:-1])
+            rooms_y = np.split(data['rooms_y'], np.cumsum(room_sizes[:, 1])[:-1])
+            dungeon.rooms = [[x, y] for x, y in zip(rooms_x, rooms_y)]
+
+        (stairs_x, stairs_y), (player_x, player_y) = data['locations'].tolist()
+        dungeon.downstairs_location = (stairs_x, stairs_y)
+        engine.player.place(player_x, player_y, dungeon)
+        dungeon.distance_from_start = dungeon.calc_distance_map(player_x, player_y)
+
+        paths, requests = data['entity_paths'].tolist(), data['entity_requests'].tolist()
+        for registry, source, x, y, hp in data['entities'].tolist():
+            entity = registries[registry][1].get(paths[source], requests[source]).spawn(dungeon, x, y)
+            if hp >= 0:
+                entity.fighter.hp = hp
+
+        return dungeon
+
+    def store(self, key: str, dungeon: SimpleGameMap) -> bool:
+        """
+        Save a newly generated floor under a key. Returns False without saving if the floor holds an entity which
+        cannot be rebuilt from a prototype.
+        """
+        player = dungeon.engine.player
+        sources: Dict[Tuple[str, str], int] = {}
+        records = []
+        for entity in sorted(dungeon.entities, key=lambda entity: entity.spawn_number):
+            if entity is player:
+                continue
+            registry = entity_registry(entity)
+            if registry is None:
+                return False
+            source = sources.setdefault(entity.prototype, len(sources))
+            hp = entity.fighter.hp if isinstance(entity, Actor) else -1
+            records.append((registry, source, entity.x, entity.y, hp))
+        records = np.array(records, dtype=np.int32).reshape(-1, 5)  # Registry, source, x, y and hp of each entity
+
+        tiles, tile_index = np.unique(dungeon.tiles, return_inverse=True)
+        rooms_x = [x for x, y in dungeon.rooms]
+        rooms_y = [y for x, y in dungeon.rooms]
+
+        # Written to a temporary file of its own first, as the pre-generation worker may be storing the same floor
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+            np.savez_compressed(
+                f,
+                tile_names=maps.tiles.names[tiles],
+                tile_index=tile_index.reshape(dungeon.tiles.shape).astype(np.uint8),
+                tunnel=dungeon.tunnel,
+                rooms_x=np.concatenate(rooms_x or [[]]).astype(np.int16),
+                rooms_y=np.concatenate(rooms_y or [[]]).astype(np.int16),
+                room_sizes=np.array([(len(x), len(y)) for x, y in dungeon.rooms], dtype=np.int16).reshape(-1, 2),
+                locations=np.array([dungeon.downstairs_location, (player.x, player.y)], dtype=np.int16),
+                entity_paths=np.array([source[0] for source in sources], dtype=str),
+                entity_requests=np.array([source[1] for source in sources], dtype=str),
+                entities=records
+            )
+        os.replace(f.name, self.path(key))
+        return True
+
+
+def entity_registry(entity: Entity) -> Optional[int]:
+    """Return the index of the registry which an entity was cloned from, or None if it was not built from one."""
+    if entity.prototype is None:
+        return None
+    for index, (entity_type, registry) in enumerate(registries):
+        if isinstance(entity, entity_type):
+            return index
+    return None
@@ -1,91 +1,335 @@
 from __future__ import annotations
 
+import concurrent.futures
+import math
+import multiprocessing
+import os
 import random
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING, Tuple, Dict, List
+import time
+import traceback
+from typing import Callable, Iterable, Iterator, Optional, TYPE_CHECKING, Tuple, Dict, List, Set
 
 import numpy as np
 
 import parts.entity
 from parts.ai import PassiveStationary, NPC
+from maps.accessibility import AccessibilityMap
+from maps.navigation import NavigationGrid
+from maps.tile_sampler import TileSampler
 from parts.entity import Item
-from utils.math_utils import Graph
 
 if TYPE_CHECKING:
     from core.engine import Engine
-    from parts.entity import Entity
+    from maps.pipeline import StageHook
+    from parts.entity import Actor, Entity
 
 import maps.tiles
 
+unreachable = np.iinfo(np.int32).max  # Distance map value of tiles which cannot be walked to
+
+# Floors are generated by running a list of named stages in order, see maps.procgen.generation_stages
+cave_stages = ["caves", "rooms", "rubble", "hazards", "features", "verdant", "connectivity", "player", "flora", "fauna",
+               "npcs", "items", "static_objects", "stairs", "accessible"]
+eroded_cave_stages = cave_stages[:2] + ["erode"] + cave_stages[2:]
+
+# Biome settings which change upon reaching each floor. Floors without an entry keep the settings of the floor above.
+biome_profiles: Dict[int, dict] = {
+    # First floor, unique scenario
+    1: {"stages": cave_stages},
+    # 3 floors of surface caves. Caves get broader as you descend
+    2: {"stages": eroded_cave_stages, "room_max_size": 4, "room_min_size": 1, "cave_smoothing": 2, "cave_p": 45},
+    3: {"cave_smoothing": 3, "cave_p": 40},
+    4: {"cave_smoothing": 4, "cave_p": 35},
+    # 4th floor suddenly breaks into tunnels
+    5: {"stages": cave_stages, "max_rooms": 25, "cave_smoothing": 1, "cave_p": 45},
+    # 5th and 6th floors are progressively narrowing tunnels
+    6: {"max_rooms": 30, "room_min_size": 0, "room_max_size": 3},
+    7: {"max_rooms": 35, "room_min_size": -1, "room_max_size": 2}
+}
+
+
+class EntityGroup:
+    """
+    A set of the entities of one kind upon a map, kept up to date as entities are added to and removed from the map.
+    Membership tests are O(1). Iterating over a group iterates over a snapshot of it, which is reused until the group
+    next changes, so that entities may be added or removed (e.g. killed) while looping over it. Members are kept in
+    the order they joined the group, rather than the arbitrary order of a set.
+    """
+
+    def __init__(self):
+        self.members: Dict[Entity, None] = {}  # Used as an insertion-ordered set
+        self.snapshot: Optional[Tuple[Entity, ...]] = None
+
+    def add(self, entity: Entity) -> None:
+        if entity not in self.members:
+            self.members[entity] = None
+            self.snapshot = None
+
+    def discard(self, entity: Entity) -> None:
+        if entity in self.members:
+            del self.members[entity]
+            self.snapshot = None
+
+    def __contains__(self, entity: Entity) -> bool:
+        return entity in self.members
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __iter__(self) -> Iterator[Entity]:
+        if self.snapshot is None:
+            self.snapshot = tuple(self.members)
+        return iter(self.snapshot)
+
+
+def entity_group_names(entity: Entity) -> List[str]:
+    """Return the names of the SimpleGameMap entity groups which an entity belongs in."""
+    if isinstance(entity, parts.entity.Actor):
+        if not entity.is_alive:
+            return ["all_actors"]
+        if isinstance(entity.ai, (PassiveStationary, NPC)) or entity.name == "Player":
+            return ["all_actors", "actors"]
+        return ["all_actors", "actors", "dangerous_actors"]
+    if isinstance(entity, parts.entity.Item):
+        return ["items"]
+    if isinstance(entity, parts.entity.Corpse):
+        return ["corpses"]
+    if isinstance(entity, parts.entity.StaticObject):
+        return ["static_objects"]
+    return []
+
+
+def ring_cells(x: int, y: int, radius: int) -> Iterator[Tuple[int, int]]:
+    """Yield every location exactly radius tiles (Chebyshev distance) from x, y, which may lie outside of the map."""
+    if radius == 0:
+        yield x, y
+        return
+    for dx in range(-radius, radius + 1):
+        yield x + dx, y - radius
+        yield x + dx, y + radius
+    for dy in range(-radius + 1, radius):
+        yield x - radius, y + dy
+        yield x + radius, y + dy
+
 
 class SimpleGameMap:
     def __init__(
             self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()):
         self.engine = engine
         self.width, self.height = width, height
+        entities = list(entities)
+        for number, entity in enumerate(entities):
+            entity.spawn_number = number
         self.entities = set(entities)
+        self.spawn_count = len(entities)  # Number given to the next entity added, see add_entity
         self.exiles = []
-        self.tiles = np.full((width, height), fill_value=maps.tiles.wall, order="F")
+        # Spatial index of the entities, kept up to date by add_entity, remove_entity and move_entity
+        self.entity_cells: Dict[Tuple[int, int], List[Entity]] = {}  # Entities upon each occupied tile
+        self.blocking = np.zeros((width, height), dtype=np.uint8, order="F")  # Blocking entities upon each tile
+        self.occupied = np.zeros((width, height), dtype=np.uint8, order="F")  # Actors upon each tile
+        # Entities of each kind, kept up to date by add_entity, remove_entity and update_entity
+        self.entity_groups: Dict[str, EntityGroup] = {}
+        self.tiles = np.full((width, height), fill_value=maps.tiles.wall, dtype=np.uint8, order="F")  # Tile IDs
         self.rooms = []
         self.tunnel = np.full((width, height), fill_value=False, order="F")  # Tunnel tiles
         self.visible = np.full((width, height), fill_value=False, order="F")  # Tiles the player can currently see
         self.explored = np.full((width, height), fill_value=False, order="F")  # Tiles the player has seen before
-        self.accessible = np.full((width, height), fill_value=False, order="F")  # Tiles the player can access by foot
+        # Moves needed to walk to each tile from the player's start location
+        self.distance_from_start = np.full((width, height), fill_value=unreachable, dtype=np.int32, order="F")
 
         self.downstairs_location = (0, 0)
+        self.sampler = TileSampler(self)  # Random tiles of the map, cached until tiles_changed is called
+        self.accessibility = AccessibilityMap(self)  # Regions of walkable tiles, see the accessible property
+        self.navigation = NavigationGrid(self)  # Movement costs shared by all pathfinding upon this map
+        self.index_entities()
 
     @property
     def gamemap(self) -> SimpleGameMap:
         return self
 
     @property
-    def actors(self) -> Iterator[parts.entity.Actor]:
-        """Iterate over this maps living actors."""
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, parts.entity.Actor) and entity.is_alive
-        )
+    def walkable(self) -> np.ndarray:
+        """Tiles which can be walked over."""
+        return maps.tiles.walkable[self.tiles]
+
+    @property
+    def transparent(self) -> np.ndarray:
+        """Tiles which do not block FOV."""
+        return maps.tiles.transparent[self.tiles]
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        """Return True if the tile at x, y can be walked over."""
+        return bool(maps.tiles.walkable[self.tiles[x, y]])
+
+    def has_flag(self, flag: maps.tiles.TileFlag) -> np.ndarray:
+        """Return a mask of the tiles whose type has any of the given flags, e.g. TileFlag.Hole."""
+        return (maps.tiles.flags[self.tiles] & flag) != 0
+
+    def tile_has_flag(self, x: int, y: int, flag: maps.tiles.TileFlag) -> bool:
+        """Return True if the type of the tile at x, y has any of the given flags."""
+        return bool(maps.tiles.flags[self.tiles[x, y]] & flag)
+
+    @property
+    def verdant(self) -> np.ndarray:
+        """Overgrown tiles, which plants grow on."""
+        return self.has_flag(maps.tiles.TileFlag.Verdant)
+
+    @property
+    def liquid(self) -> np.ndarray:
+        """Tiles of water, including waterfalls."""
+        return self.has_flag(maps.tiles.TileFlag.Liquid)
+
+    @property
+    def hazards(self) -> np.ndarray:
+        """Tiles which are dangerous to enter, such as liquids and holes."""
+        return self.has_flag(maps.tiles.TileFlag.Hazard)
 
     @property
-    def dangerous_actors(self) -> Iterator[parts.entity.Actor]:
-        """Iterate over this maps living actors that are able to harm the player."""
-        yield from (
-            entity
-            for entity in self.entities
-            if
-            isinstance(entity, parts.entity.Actor) and entity.is_alive and not isinstance(entity.ai, PassiveStationary)
-            and not isinstance(entity.ai, NPC) and not entity.name == "Player"
-        )
+    def accessible(self) -> np.ndarray:
+        """Tiles the player can access by foot. Shared until the map changes, so must not be modified."""
+        return self.accessibility.mask
 
     @property
-    def items(self) -> Iterator[Item]:
-        yield from (entity for entity in self.entities if isinstance(entity, parts.entity.Item))
+    def all_actors(self) -> EntityGroup:
+        """This maps actors, living or not."""
+        return self.entity_groups["all_actors"]
 
-    def get_tile_at_explored_location(self, location_x: int, location_y: int) -> Optional[maps.tiles.tile_dt]:
+    @property
+    def actors(self) -> EntityGroup:
+        """This maps living actors."""
+        return self.entity_groups["actors"]
+
+    @property
+    def dangerous_actors(self) -> EntityGroup:
+        """This maps living actors that are able to harm the player."""
+        return self.entity_groups["dangerous_actors"]
+
+    @property
+    def items(self) -> EntityGroup:
+        return self.entity_groups["items"]
+
+    @property
+    def corpses(self) -> EntityGroup:
+        return self.entity_groups["corpses"]
+
+    @property
+    def static_objects(self) -> EntityGroup:
+        return self.entity_groups["static_objects"]
+
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map at its current location, numbering it in the order entities were added."""
+        entity.spawn_number = self.spawn_count
+        self.spawn_count += 1
+        self.entities.add(entity)
+        self.index_entity(entity, 1)
+        for name in entity_group_names(entity):
+            self.entity_groups[name].add(entity)
+        if isinstance(entity, parts.entity.StaticObject):
+            self.accessibility.objects_changed()
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map. Does nothing if the entity is not upon this map."""
+        if entity in self.entities:
+            self.entities.remove(entity)
+            self.index_entity(entity, -1)
+            for group in self.entity_groups.values():
+                group.discard(entity)
+            if isinstance(entity, parts.entity.StaticObject):
+                self.accessibility.objects_changed()
+
+    def update_entity(self, entity: Entity) -> None:
+        """Move an entity into the right entity groups after a change of its kind, such as a change of AI."""
+        names = entity_group_names(entity) if entity in self.entities else []
+        for name, group in self.entity_groups.items():
+            if name in names:
+                group.add(entity)
+            else:
+                group.discard(entity)
+
+    def move_entity(self, entity: Entity, x: int, y: int) -> None:
+        """Move an entity upon this map to a new location."""
+        self.index_entity(entity, -1)
+        entity.x, entity.y = x, y
+        self.index_entity(entity, 1)
+
+    def index_entity(self, entity: Entity, count: int) -> None:
+        """Add (count 1) or remove (count -1) an entity from the spatial index at its current location."""
+        location = (entity.x, entity.y)
+        if count > 0:
+            self.entity_cells.setdefault(location, []).append(entity)
+        else:
+            cell = self.entity_cells[location]
+            cell.remove(entity)
+            if not cell:
+                del self.entity_cells[location]
+        if entity.blocks_movement:
+            self.blocking[location] += count
+            self.navigation.update_tile(*location)
+        if isinstance(entity, parts.entity.Actor):
+            self.occupied[location] += count
+
+    def index_entities(self) -> None:
+        """Rebuild the spatial index and entity groups from scratch, e.g. after replacing the set of entities."""
+        self.entity_cells = {}
+        self.blocking[:] = 0
+        self.occupied[:] = 0
+        self.entity_groups = {name: EntityGroup() for name in
+                              ["all_actors", "actors", "dangerous_actors", "items", "corpses", "static_objects"]}
+        for entity in sorted(self.entities, key=lambda entity: entity.spawn_number):
+            self.index_entity(entity, 1)
+            for name in entity_group_names(entity):
+                self.entity_groups[name].add(entity)
+        self.accessibility.objects_changed()
+        self.navigation.invalidate()
+
+    def check_entity_index(self) -> None:
+        """
+        Raise an AssertionError if the spatial index or entity groups do not match the entities, which would mean that
+        an entity was moved, removed or changed without going through this map. Only intended for debugging.
+        """
+        cells: Dict[Tuple[int, int], Set[Entity]] = {}
+        blocking = np.zeros_like(self.blocking)
+        occupied = np.zeros_like(self.occupied)
+        groups: Dict[str, Set[Entity]] = {name: set() for name in self.entity_groups}
+        for entity in self.entities:
+            cells.setdefault((entity.x, entity.y), set()).add(entity)
+            if entity.blocks_movement:
+                blocking[entity.x, entity.y] += 1
+            if isinstance(entity, parts.entity.Actor):
+                occupied[entity.x, entity.y] += 1
+            for name in entity_group_names(entity):
+                groups[name].add(entity)
+
+        for location in cells.keys() | self.entity_cells.keys():
+            if cells.get(location, set()) != set(self.entity_cells.get(location, ())):
+                raise AssertionError(f"Entity index does not match the entities at {location}.")
+        if not (np.array_equal(blocking, self.blocking) and np.array_equal(occupied, self.occupied)):
+            raise AssertionError("Entity index does not match the blocking entities or actors.")
+        for name, group in self.entity_groups.items():
+            if set(group.members) != groups[name]:
+                raise AssertionError(f"Entity group '{name}' does not match the entities.")
+
+    def get_tile_at_explored_location(self, location_x: int, location_y: int) -> Optional[int]:
         """Returns a tile within the explored array."""
         if self.explored[location_x, location_y]:
             return self.tiles[location_x, location_y]
 
     def get_all_entities_at_location(self, location_x: int, location_y: int) -> Optional[List[Entity]]:
         """Returns all entities at a given tile location x, y."""
-        entities = []
-        for entity in self.entities:
-            if entity.x == location_x and entity.y == location_y:
-                entities.append(entity)
-        return entities
+        return list(self.entity_cells.get((location_x, location_y), ()))
 
     def get_all_visible_entities(self, location_x: int, location_y: int) -> Optional[List[Entity]]:
         """Returns all enemies within the FOV."""
-        entities = []
-        for entity in self.entities:
-            if entity.x == location_x and entity.y == location_y and self.visible[location_x, location_y]:
-                entities.append(entity)
-        return entities
+        if not self.visible[location_x, location_y]:
+            return []
+        return self.get_all_entities_at_location(location_x, location_y)
 
     def get_blocking_entity_at_location(self, location_x: int, location_y: int) -> Optional[Entity]:
         """Returns the entity if it is at location x, y."""
-        for entity in self.entities:
-            if entity.blocks_movement and entity.x == location_x and entity.y == location_y:
+        if not self.in_bounds(location_x, location_y) or not self.blocking[location_x, location_y]:
+            return None
+        for entity in self.entity_cells[location_x, location_y]:
+            if entity.blocks_movement:
                 return entity
 
         return None
@@ -97,26 +341,83 @@ class SimpleGameMap:
         interactables = []
         for x in x_values:
             for y in y_values:
-                for entity in self.entities:
-                    if (entity.x == x and entity.y == y) and (isinstance(entity, parts.entity.StaticObject) or \
-                                                              isinstance(entity.ai, parts.ai.NPC)):
+                for entity in self.entity_cells.get((x, y), ()):
+                    if isinstance(entity, parts.entity.StaticObject) or isinstance(entity.ai, parts.ai.NPC):
                         interactables.append(entity)
         return interactables
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[parts.entity.Actor]:
         """Returns the Actor at location x, y."""
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        if not self.in_bounds(x, y) or not self.occupied[x, y]:
+            return None
+        for entity in self.entity_cells[x, y]:
+            if isinstance(entity, parts.entity.Actor) and entity.is_alive:
+                return entity
 
         return None
 
+    def get_entities_within(self, x: int, y: int, radius: float, metric: str = "euclidean",
+                            visible_only: bool = False, kind: Optional[type] = None,
+                            predicate: Optional[Callable[[Entity], bool]] = None) -> List[Entity]:
+        """
+        Return the entities no further than radius from x, y, nearest first, by either "euclidean" or "chebyshev"
+        distance. Entities may be limited to those upon visible tiles, those of a kind of entity, e.g. Actor, and those
+        for which predicate returns True.
+        """
+        return self.get_nearest_entities(x, y, None, radius, metric, visible_only, kind, predicate)
+
+    def get_nearest_entities(self, x: int, y: int, k: Optional[int] = 1, radius: Optional[float] = None,
+                             metric: str = "euclidean", visible_only: bool = False, kind: Optional[type] = None,
+                             predicate: Optional[Callable[[Entity], bool]] = None) -> List[Entity]:
+        """
+        Return the k entities nearest to x, y, nearest first, or every matching entity if k is None. Entities which tie
+        for distance are ordered by location. See get_entities_within for the other arguments.
+        Only the tiles of the spatial index around x, y are searched, in rings of increasing distance until no closer
+        entity can remain; when the area to search is larger than the number of occupied tiles, every occupied tile is
+        checked instead.
+        """
+        if metric == "euclidean":
+            def distance(dx: int, dy: int) -> float:
+                return dx * dx + dy * dy  # Squared, as is the limit below
+            limit = math.inf if radius is None else radius * radius
+        elif metric == "chebyshev":
+            def distance(dx: int, dy: int) -> float:
+                return max(abs(dx), abs(dy))
+            limit = math.inf if radius is None else radius
+        else:
+            raise ValueError(f"Unknown distance metric '{metric}'.")
+
+        reach = max(self.width, self.height) if radius is None else min(int(radius), max(self.width, self.height))
+        if (2 * reach + 1) ** 2 > len(self.entity_cells):
+            rings = [iter(self.entity_cells.keys())]
+        else:
+            rings = (ring_cells(x, y, ring) for ring in range(reach + 1))
+
+        found = []
+        for ring, cells in enumerate(rings):
+            for cell_x, cell_y in cells:
+                entities = self.entity_cells.get((cell_x, cell_y))
+                if not entities or (visible_only and not self.visible[cell_x, cell_y]):
+                    continue
+                cell_distance = distance(cell_x - x, cell_y - y)
+                if cell_distance > limit:
+                    continue
+                for entity in entities:
+                    if (kind is None or isinstance(entity, kind)) and (predicate is None or predicate(entity)):
+                        found.append((cell_distance, cell_x, cell_y, entity))
+            # Entities in the following rings are at least ring + 1 tiles away, so the search can stop once k entities
+            # are strictly closer than that
+            if k is not None and len(found) >= k:
+                found.sort(key=lambda match: match[:3])
+                if found[k - 1][0] < distance(ring + 1, 0):
+                    break
+
+        found.sort(key=lambda match: match[:3])
+        return [match[3] for match in found[:k]]
+
     def get_occupied(self):
-        """Return all tiles which have an entity at their coordinates."""
-        tiles = np.full((self.width, self.height), fill_value=False, order="F")
-        for actor in self.actors:
-            tiles[actor.x, actor.y] = True
-        return tiles
+        """Return all tiles which have an actor at their coordinates."""
+        return self.occupied > 0
 
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are within map bounds."""
@@ -131,74 +432,62 @@ class SimpleGameMap:
                     continue
                 yield (x + a, y + b)
 
-    def get_random_walkable_tile(self) -> Tuple[int, int]:
+    def tiles_changed(self) -> None:
+        """
+        Forget anything cached about the tiles of this map. Must be called after changing tiles or the tunnel directly,
+        rather than through set_tile.
+        """
+        self.sampler.invalidate()
+        self.accessibility.invalidate()
+        self.navigation.invalidate()
+
+    def set_tile(self, x: int, y: int, tile: int) -> None:
+        """Change a single tile of the map, e.g. when rubble is cleared or the floor collapses."""
+        self.tiles[x, y] = tile
+        self.sampler.invalidate()
+        self.accessibility.set_walkable(x, y, bool(maps.tiles.walkable[tile]))
+        self.navigation.update_tile(x, y)
+
+    def get_random_walkable_tile(self, rng: Optional[random.Random] = None) -> Tuple[int, int]:
         """Return the coordinates of a random walkable tile within the current floor."""
-        walkable = np.nonzero(
-            np.logical_and(self.tiles['walkable'], self.tiles['name'] != 'hole')
-        )
-        index = random.randint(0, len(walkable[0]) - 1)
-        x = walkable[0][index]
-        y = walkable[1][index]
-
-        return (x, y)
-
-    def get_random_unoccupied_nonfov_tile(self) -> Tuple[int, int]:
-        """Return the coordinates of a random walkable tile within the current floor."""
-        walkable = np.logical_and(self.tiles['walkable'], self.tiles['name'] != 'hole')
-        unoccupied = np.nonzero(np.logical_xor(walkable, self.get_occupied()))
-        index = random.randint(0, len(unoccupied[0]) - 1)
-        x = unoccupied[0][index]
-        y = unoccupied[1][index]
-
-        return (x, y)
-
-    def get_random_nearby_tile(self, location_x: int, location_y: int, radius: int) -> Tuple[int, int]:
-        """Return the coordinates of a random tile of radius away from location x, y."""
-        walkable = np.logical_and(self.tiles['walkable'], self.tiles['name'] != 'hole')
-        unoccupied = np.nonzero(np.logical_xor(walkable, self.get_occupied()))
-        x_region = list(np.unique(unoccupied[0])[location_x-radius:location_x+radius])
-        y_region = list(np.unique(unoccupied[1])[location_y-radius:location_y+radius])
-        if x_region == []:
-            x_region = [location_x]
-        if y_region == []:
-            y_region = [location_y]
-        x = random.choice(x_region)
-        y = random.choice(y_region)
-
-        return (x, y)
-
-    def get_random_walkable_nontunnel_tile(self) -> Tuple[int, int]:
+        return self.sampler.random_tile("walkable", rng or self.engine.rng.mapgen)
+
+    def get_random_unoccupied_nonfov_tile(self, rng: Optional[random.Random] = None) -> Tuple[int, int]:
+        """Return the coordinates of a random walkable tile without an actor, outside of the player's FOV."""
+        return self.sampler.random_tile("walkable", rng or self.engine.rng.mapgen, unoccupied=True, hidden=True)
+
+    def get_random_nearby_tile(self, location_x: int, location_y: int, radius: int,
+                               rng: Optional[random.Random] = None) -> Optional[Tuple[int, int]]:
+        """
+        Return the coordinates of a random walkable tile without an actor, up to radius tiles away from location x, y.
+        Returns None if there is no such tile.
+        """
+        return self.sampler.random_tile_within("walkable", location_x, location_y, radius,
+                                               rng or self.engine.rng.mapgen)
+
+    def get_random_walkable_nontunnel_tile(self, rng: Optional[random.Random] = None) -> Tuple[int, int]:
         """Return the coordinates of a random walkable tile that is not a tunnel within the current floor."""
-        walkable = np.nonzero(
-            np.logical_xor(np.logical_and(self.tiles['walkable'], self.tiles['name'] != 'hole'),
-                           self.tunnel)
-        )
-        index = random.randint(0, len(walkable[0]) - 1)
-        x = walkable[0][index]
-        y = walkable[1][index]
+        return self.sampler.random_tile("nontunnel", rng or self.engine.rng.mapgen)
 
-        return (x, y)
+    def calc_distance_map(self, x: int, y: int) -> np.ndarray:
+        """
+        Return the number of moves needed to walk from (x, y) to every tile of the map, using a single Dijkstra pass.
+        Tiles which cannot be walked to are set to unreachable.
+        """
+        return self.navigation.distance_map("terrain", x, y)
 
-    def calc_accessible(self):
+    def calc_accessible(self) -> np.ndarray:
         """Calculate which tiles within the walkable map are accessible to the player."""
-        player = self.engine.player
-        walkable = self.tiles['walkable']
-
-        graph = Graph(self.width, self.height, walkable)
-        accessible = graph.find_connected_area(player.x, player.y)
-
-        # Tiles with blocking objects are inaccessible
-        for entity in self.entities:
-            if isinstance(entity, parts.entity.StaticObject):
-                accessible[entity.x, entity.y] = False
-
-        return accessible
+        self.accessibility.rebuild()
+        return self.accessible
 
 
 # TODO: Add saved gamemaps to gameworld
 class GameWorld:
     """
     Holds the settings for the GameMap, and generates new maps when moving down the stairs.
+    Every floor is generated from its own seed, derived from the world seed, so that the next floor can be generated
+    ahead of time in a worker process while the current floor is being played.
     """
 
     def __init__(
@@ -212,14 +501,22 @@ class GameWorld:
             map_height: int,
             cave_smoothing: int = 1,
             cave_p: int = 50,
-            caves: bool = True,
-            rooms: bool = True,
-            erode: bool = False,
+            stages: Optional[List[str]] = None,
             floors: Dict[str, SimpleGameMap] = None,
-            current_floor: int = 0
+            current_floor: int = 0,
+            seed: Optional[int] = None,
+            pregenerate: bool = True,
+            floor_cache: Optional[str] = None,
+            best_of: int = 1,
+            floor_requirements: Optional[Dict[str, int]] = None,
+            search_workers: Optional[int] = None
     ):
         if floors is None:
             floors = {}
+        if stages is None:
+            stages = cave_stages
+        if seed is None:
+            seed = engine.rng.master_seed
         # Floor params
         self.max_rooms = max_rooms
         self.room_max_size = room_max_size
@@ -229,88 +526,206 @@ class GameWorld:
         # Biome params
         self.cave_smoothing = cave_smoothing
         self.cave_p = cave_p
-        self.caves = caves
-        self.rooms = rooms
-        self.erode = erode
+        self.stages = list(stages)  # Names of the generation stages run for each floor of this biome
 
         self.engine = engine
         self.floors = floors
         self.current_floor = current_floor
+        self.seed = seed
+        self.floor_cache = floor_cache  # Directory of previously generated floors to reuse, if any
+        # Number of candidates generated for each floor, keeping the one which best meets the floor requirements
+        self.best_of = best_of
+        self.floor_requirements = floor_requirements  # Keyword arguments of maps.seed_search.FloorRequirements
+        self.search_workers = search_workers  # Worker processes generating the candidates, by default one per core
+
+        # Background generation of the next floor
+        self.pregenerate = pregenerate
+        self.executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self.pregenerated_floor: Optional[concurrent.futures.Future] = None
+
+    def __getstate__(self) -> dict:
+        # Worker processes and pending results cannot be saved, the next floor is simply generated again on load
+        state = self.__dict__.copy()
+        state["executor"] = None
+        state["pregenerated_floor"] = None
+        return state
 
-    def generate_floor(self) -> None:
-        from maps.procgen import generate_dungeon
+    @property
+    def settings(self) -> dict:
+        """The parameters needed to build a copy of this GameWorld in another process."""
+        return {
+            "max_rooms": self.max_rooms,
+            "room_max_size": self.room_max_size,
+            "room_min_size": self.room_min_size,
+            "map_width": self.map_width,
+            "map_height": self.map_height,
+            "cave_smoothing": self.cave_smoothing,
+            "cave_p": self.cave_p,
+            "stages": self.stages,
+            "current_floor": self.current_floor,
+            "seed": self.seed,
+            "floor_cache": self.floor_cache,
+            "best_of": self.best_of,
+            "floor_requirements": self.floor_requirements,
+            "search_workers": self.search_workers
+        }
+
+    def floor_seed(self, floor: int, candidate: int = 0) -> int:
+        """
+        Return the seed which the given floor is generated from. Candidates other than 0 give alternative seeds for the
+        same floor, see best_floor_seed.
+        """
+        entropy = (self.seed, floor) if candidate == 0 else (self.seed, floor, candidate)
+        return int(np.random.SeedSequence(entropy).generate_state(1)[0])
+
+    def best_floor_seed(self) -> int:
+        """
+        Return the seed of whichever of best_of candidates for the current floor best meets the floor requirements.
+        Candidates are spread across search_workers worker processes, by default one per core, but never more workers
+        than there are candidates.
+        """
+        from maps.seed_search import FloorRequirements, search_seeds
+
+        seeds = [self.floor_seed(self.current_floor, candidate) for candidate in range(self.best_of)]
+        requirements = FloorRequirements(**(self.floor_requirements or {}))
+        workers = min(self.search_workers or os.cpu_count() or 1, len(seeds))
+        return search_seeds(self.settings, self.engine.player, seeds, requirements, workers=workers)[0].seed
 
-        # Logic for floor generation
-        self.current_floor += 1
-        if self.current_floor == 1:
-            # First floor, unique scenario
-            new_floor = generate_dungeon(
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-            )
-        elif 2 <= self.current_floor <= 4:
-            # 3 floors of surface caves. Caves get broader as you descend
-            self.room_max_size = 4
-            self.room_min_size = 1
-            self.cave_smoothing += 1
-            self.cave_p -= 5
-            self.rooms = True
-            self.erode = True
-            new_floor = generate_dungeon(
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-            )
-        elif self.current_floor == 5:
-            # 4th floor suddenly breaks into tunnels
-            self.max_rooms = 25
-            self.room_max_size = 4
-            self.room_min_size = 1
-            self.cave_smoothing = 1
-            self.cave_p += 10
-            self.rooms = True
-            self.erode = False
-            new_floor = generate_dungeon(
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-            )
-        elif 6 <= self.current_floor <= 7:
-            # 5th and 6th floors are progressively narrowing tunnels
-            self.max_rooms += 5
-            self.room_min_size -= 1
-            self.room_max_size -= 1
-            new_floor = generate_dungeon(
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-            )
-        else:
-            # Not yet implemented
-            new_floor = generate_dungeon(
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-            )
+    def generate_floor(self) -> None:
+        """Move to the next floor, adopting it from the background worker if it has already been generated."""
+        self.advance_floor()
+        new_floor = self.adopt_pregenerated_floor()
+        if new_floor is None:
+            new_floor = self.generate_seeded_dungeon()
 
         self.engine.game_map = new_floor
         self.floors[f'level_{self.current_floor}'] = new_floor
+        self.start_pregeneration()
+
+    def advance_floor(self) -> None:
+        """
+        Increment the current floor and apply the biome settings used to generate it, see biome_profiles. The monsters
+        of the floor being left are forgotten by the engine's scheduling.
+        """
+        self.current_floor += 1
+        self.engine.turn_queue.clear()
+        self.engine.scheduler.awake.clear()
+        for name, value in biome_profiles.get(self.current_floor, {}).items():
+            setattr(self, name, list(value) if name == "stages" else value)
+
+    def generate_seeded_dungeon(self, hooks: Optional[List[StageHook]] = None) -> SimpleGameMap:
+        """
+        Generate the current floor from its seed. Only the engine's map generation and spawning streams are reseeded,
+        so generating a floor does not change the sequence of random numbers used during play.
+        If a floor cache is in use, a floor previously generated with the same seed and settings is loaded instead.
+        If best_of is above 1, the floor is generated from the best of that many candidate seeds.
+        The given hooks are called around every stage of generation, see generate_dungeon.
+        """
+        from maps.floor_cache import FloorCache, floor_key
+        from maps.procgen import generate_dungeon
+
+        cache = None
+        if self.floor_cache:
+            cache = FloorCache(self.floor_cache)
+            # Settings which do not change the floor generated are left out of its key
+            key = floor_key({name: value for name, value in self.settings.items()
+                             if name not in ("floor_cache", "search_workers")})
+            dungeon = cache.load(key, self.engine)
+            if dungeon is not None:
+                return dungeon
+
+        floor_seed = self.floor_seed(self.current_floor)
+        if self.best_of > 1:
+            floor_seed = self.best_floor_seed()
+        self.engine.rng.seed_floor(floor_seed)
+        dungeon = generate_dungeon(engine=self.engine, hooks=hooks)
+        if cache is not None:
+            cache.store(key, dungeon)
+        return dungeon
+
+    def start_pregeneration(self) -> None:
+        """Begin generating the floor below the current one in a worker process."""
+        if not self.pregenerate:
+            return
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+        # The worker gets its own copy of the player, detached from the current floor
+        player = self.engine.player.clone()
+        del player.parent
+        self.pregenerated_floor = self.executor.submit(generate_detached_floor, self.settings, player)
+
+    def stop_pregeneration(self) -> None:
+        """Cancel any floor being generated in the background and shut down the worker, e.g. when the game ends."""
+        self.pregenerated_floor = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def adopt_pregenerated_floor(self) -> Optional[SimpleGameMap]:
+        """
+        Return the floor generated in the background for the current floor, waiting for it to finish if necessary.
+        Returns None if no floor was being generated, or if generation failed.
+        """
+        future = self.pregenerated_floor
+        self.pregenerated_floor = None
+        if future is None:
+            return None
+
+        start = time.perf_counter()
+        while True:
+            try:
+                floor, dungeon, player_location = future.result(timeout=0.1)
+                break
+            except concurrent.futures.TimeoutError:
+                render_generation_progress(self.current_floor, time.perf_counter() - start)
+            except Exception:
+                # Fall back to generating the floor here, with a fresh worker for the floors that follow
+                traceback.print_exc()
+                self.stop_pregeneration()
+                return None
+
+        if floor != self.current_floor:
+            return None
+
+        # Attach the new floor to this game, then place the player at the start location it was generated with
+        dungeon.engine = self.engine
+        self.engine.player.place(*player_location, dungeon)
+        return dungeon
+
+
+def generate_detached_floor(settings: dict, player: Actor) -> Tuple[int, SimpleGameMap, Tuple[int, int]]:
+    """
+    Generate the floor after the one described by a GameWorld's settings, for use within a worker process.
+    Returns the floor number and the map, detached from the worker's engine and player, along with the player's start
+    location.
+    """
+    from core.engine import Engine
+
+    engine = Engine(player=player)
+    engine.game_world = GameWorld(engine=engine, pregenerate=False, **settings)
+    engine.game_world.advance_floor()
+    dungeon = engine.game_world.generate_seeded_dungeon()
+
+    dungeon.remove_entity(player)
+    dungeon.engine = None
+    return engine.game_world.current_floor, dungeon, (player.x, player.y)
+
+
+def render_generation_progress(floor: int, elapsed: float) -> None:
+    """Draw a popup while waiting on the next floor, if the game is running in a window."""
+    import core.g
+    if not hasattr(core.g, "context"):
+        return
+
+    text = f"Descending to floor {floor}" + "." * (int(elapsed * 4) % 4)
+    width = len(text) + 7
+    x = core.g.console.width // 2 - width // 2
+    y = core.g.console.height // 2 - 2
+    core.g.console.draw_frame(x=x, y=y, width=width, height=5, title='', clear=True, fg=(255, 255, 255), bg=(0, 0, 0))
+    core.g.console.print(x=x + 3, y=y + 2, string=text)
+    core.g.context.present(core.g.console)
 
 
 # class GameMap:
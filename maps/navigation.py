@@ -0,0 +1,99 @@
+"""
+The cost of walking over each tile of a map, shared by all of the map's pathfinding. Costs are kept in a few layers,
+each built once from the map's tiles and then kept up to date a tile at a time as tiles change and blocking entities
+come and go, so that finding a path no longer starts by rebuilding a cost array. The pathfinding graph of each layer is
+built once and refers to the layer's costs directly.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+import tcod
+
+import parts.entity
+
+if TYPE_CHECKING:
+    from maps.game_map import SimpleGameMap
+
+# Extra cost of walking through a tile for each blocking entity upon it. A lower number means monsters crowd behind
+# each other in hallways, while a higher number means they take longer paths in order to surround their target.
+crowding_cost = 10
+
+
+class NavigationGrid:
+    """
+    Movement costs of every tile of a map, in three layers. Tiles cost 0 where they cannot be walked through.
+    - "terrain": 1 for every walkable tile.
+    - "crowded": terrain, plus crowding_cost for each blocking entity upon a tile. Used by monsters.
+    - "open": terrain, without the tiles of static objects. Used by the player's auto-travel.
+    """
+
+    def __init__(self, gamemap: SimpleGameMap):
+        self.gamemap = gamemap
+        self.costs: Dict[str, np.ndarray] = {}
+        self.graphs: Dict[str, tcod.path.SimpleGraph] = {}
+
+    def __getstate__(self) -> dict:
+        # Graphs cannot be pickled, and the costs are cheap to rebuild
+        return {"gamemap": self.gamemap, "costs": {}, "graphs": {}}
+
+    def invalidate(self) -> None:
+        """Forget every layer, so that they are rebuilt from the map when next needed."""
+        self.costs.clear()
+        self.graphs.clear()
+
+    def rebuild(self) -> None:
+        """Build every layer from scratch from the map's tiles and entities."""
+        gamemap = self.gamemap
+        terrain = gamemap.walkable.astype(np.int32)
+        crowded = terrain + crowding_cost * gamemap.blocking * terrain
+        open_tiles = terrain.copy()
+        for entity in gamemap.static_objects:
+            open_tiles[entity.x, entity.y] = 0
+        self.costs = {"terrain": terrain, "crowded": crowded, "open": open_tiles}
+        self.graphs.clear()
+
+    def cost(self, layer: str) -> np.ndarray:
+        """Return the costs of a layer. The array is updated in place as the map changes, so must not be modified."""
+        if not self.costs:
+            self.rebuild()
+        return self.costs[layer]
+
+    def update_tile(self, x: int, y: int) -> None:
+        """Bring every layer up to date at a tile, after its tile type or the entities upon it changed."""
+        if not self.costs:
+            return  # Built from the map when next needed
+        gamemap = self.gamemap
+        walkable = int(gamemap.is_walkable(x, y))
+        self.costs["terrain"][x, y] = walkable
+        self.costs["crowded"][x, y] = walkable * (1 + crowding_cost * int(gamemap.blocking[x, y]))
+        static = any(isinstance(entity, parts.entity.StaticObject) for entity in gamemap.entity_cells.get((x, y), ()))
+        self.costs["open"][x, y] = 0 if static else walkable
+
+    def path(self, layer: str, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Return a cheapest path from start to end over a layer, moving diagonally costing 3 and cardinally 2 per point
+        of cost. The path excludes start, and is empty if end cannot be reached.
+        """
+        return [(x, y) for x, y in self.pathfinder(layer, start).path_to(end)[1:].tolist()]
+
+    def pathfinder(self, layer: str, start: Tuple[int, int]) -> tcod.path.Pathfinder:
+        """Return a new pathfinder rooted at start over a layer's graph, which is reused for as long as the layer."""
+        graph = self.graphs.get(layer)
+        if graph is None:
+            graph = self.graphs[layer] = tcod.path.SimpleGraph(cost=self.cost(layer), cardinal=2, diagonal=3)
+        # Pathfinders are not reused, as Pathfinder.clear does not reset their travel array in this version of tcod
+        pathfinder = tcod.path.Pathfinder(graph)
+        pathfinder.add_root(start)
+        return pathfinder
+
+    def distance_map(self, layer: str, x: int, y: int, cardinal: int = 1, diagonal: int = 1) -> np.ndarray:
+        """
+        Return the cost of walking from x, y to every tile over a layer, using a single Dijkstra pass. Tiles which
+        cannot be walked to are set to the maximum value of the array.
+        """
+        distance = tcod.path.maxarray((self.gamemap.width, self.gamemap.height), dtype=np.int32, order="F")
+        distance[x, y] = 0
+        tcod.path.dijkstra2d(distance, self.cost(layer), cardinal=cardinal, diagonal=diagonal, out=distance)
+        return distance
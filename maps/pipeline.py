@@ -0,0 +1,152 @@
+"""
+Floor generation as a list of named stages. Each stage modifies the map in place; hooks are called around every stage
+so that it can be timed or profiled, and the map is checkpointed after expensive stages so that a stage which fails
+later on only has to be retried from the most recent checkpoint rather than from an empty map.
+"""
+from __future__ import annotations
+
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from config.exceptions import MapGenError, FatalMapGenError
+
+if TYPE_CHECKING:
+    from core.engine import Engine
+    from maps.game_map import SimpleGameMap
+    from parts.entity import Entity
+
+
+class Stage:
+    """
+    A single named step of floor generation. Stages which are expensive to repeat should set checkpoint, so that the
+    map is saved after they run. A stage may raise MapGenError to have generation retried from the last checkpoint.
+    """
+
+    def __init__(self, name: str, run: Callable[[SimpleGameMap, Engine], None], checkpoint: bool = False):
+        self.name = name
+        self.run = run
+        self.checkpoint = checkpoint
+
+
+class StageHook:
+    """Called before and after every stage of floor generation, and whenever a stage fails."""
+
+    def before(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        pass
+
+    def after(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        pass
+
+    def failed(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        """Called when a stage raises MapGenError, before the map is restored from the last checkpoint."""
+        pass
+
+
+class WallClockHook(StageHook):
+    """Adds the wall-clock time in seconds taken by each stage to its entry in timings."""
+
+    def __init__(self, timings: Dict[str, float]):
+        self.timings = timings
+        self.start = 0.0
+
+    def before(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        self.start = time.perf_counter()
+
+    def after(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        self.timings[stage.name] = self.timings.get(stage.name, 0.0) + time.perf_counter() - self.start
+
+
+class RetryHook(StageHook):
+    """Counts the number of times each stage failed, and so had generation retried, within retries."""
+
+    def __init__(self, retries: Dict[str, int]):
+        self.retries = retries
+
+    def failed(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        self.retries[stage.name] = self.retries.get(stage.name, 0) + 1
+
+
+class AllocationHook(StageHook):
+    """
+    Records the peak memory in bytes allocated by each stage within peaks, using tracemalloc. Tracing is started by the
+    first stage if it is not already running, and slows generation down considerably while it is on.
+    """
+
+    def __init__(self, peaks: Dict[str, int]):
+        self.peaks = peaks
+        self.start = 0
+
+    def before(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.start = tracemalloc.get_traced_memory()[0]
+
+    def after(self, stage: Stage, dungeon: SimpleGameMap) -> None:
+        peak = tracemalloc.get_traced_memory()[1] - self.start
+        self.peaks[stage.name] = max(self.peaks.get(stage.name, 0), peak)
+
+
+class Checkpoint:
+    """A copy of a map part-way through generation, taken after the stage at stage_index."""
+
+    def __init__(self, dungeon: SimpleGameMap, stage_index: int):
+        self.stage_index = stage_index
+        self.tiles = dungeon.tiles.copy(order="F")
+        self.tunnel = dungeon.tunnel.copy(order="F")
+        self.rooms = list(dungeon.rooms)
+        self.downstairs_location = dungeon.downstairs_location
+        self.entities: Dict[Entity, Tuple[int, int]] = {entity: (entity.x, entity.y) for entity in dungeon.entities}
+
+    def restore(self, dungeon: SimpleGameMap) -> None:
+        """Return the map to the state it was in when this checkpoint was taken."""
+        dungeon.tiles = self.tiles.copy(order="F")
+        dungeon.tunnel = self.tunnel.copy(order="F")
+        dungeon.rooms = list(self.rooms)
+        dungeon.downstairs_location = self.downstairs_location
+        dungeon.tiles_changed()
+        dungeon.entities = set(self.entities)
+        for entity, (x, y) in self.entities.items():
+            entity.x, entity.y = x, y
+        dungeon.index_entities()
+
+
+def run_stages(dungeon: SimpleGameMap, engine: Engine, stages: List[Stage],
+               hooks: Optional[List[StageHook]] = None, max_retries: int = 10) -> SimpleGameMap:
+    """
+    Run each stage upon the map in order. If a stage raises MapGenError, the map is restored from the most recent
+    checkpoint and generation continues from the stage after it. Raises FatalMapGenError after max_retries failures.
+    Stages may change any tile, so the map's cached tile information is invalidated before each one runs.
+    """
+    if hooks is None:
+        hooks = []
+    checkpoint = Checkpoint(dungeon, -1)
+    retries = 0
+    index = 0
+    while index < len(stages):
+        stage = stages[index]
+        dungeon.tiles_changed()
+        for hook in hooks:
+            hook.before(stage, dungeon)
+        try:
+            stage.run(dungeon, engine)
+        except MapGenError:
+            for hook in hooks:
+                hook.failed(stage, dungeon)
+            retries += 1
+            if retries > max_retries:
+                raise FatalMapGenError(f"Dungeon generation failed! Reason: stage '{stage.name}' failed "
+                                       f"{retries} times.")
+            checkpoint.restore(dungeon)
+            index = checkpoint.stage_index + 1
+            continue
+        finally:
+            for hook in hooks:
+                hook.after(stage, dungeon)
+
+        if stage.checkpoint:
+            checkpoint = Checkpoint(dungeon, index)
+        index += 1
+
+    return dungeon
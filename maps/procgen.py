@@ -1,24 +1,29 @@
 from __future__ import annotations
 
-import copy
 import json
 import logging
-import random
-from typing import Tuple, Iterator, List, TYPE_CHECKING
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np
+from scipy import ndimage
 
 import config.colour
 import maps.tiles
 import parts.entity
-from config.exceptions import MapGenError, FatalMapGenError
-from data.item_factory import create_item_from_json
-from data.monster_factory import create_monster_from_json
-from data.object_factory import create_static_object_from_json
+from config.exceptions import MapGenError
+from data.item_factory import item_prototypes
+from data.monster_factory import monster_prototypes
+from data.object_factory import static_object_prototypes
+from data.prototypes import PrototypeRegistry
+from data.spawn_tables import get_spawn_table
 from maps.game_map import SimpleGameMap
+from maps.pipeline import Stage, StageHook, run_stages
+from maps.tiles import TileFlag
+from utils.math_utils import count_neighbours
 
 if TYPE_CHECKING:
     from core.engine import Engine
+    from utils.random_utils import RandomStream
 
 import tcod
 
@@ -77,250 +82,118 @@ def get_max_value_for_floor(max_value_by_floor: List[Tuple[int, int]], floor: in
 
 
 def get_monsters_at_random(engine: Engine, path: str, number_of_entities: int) -> [List[str], List[str]]:
-    # Load drop table for current floor
-    f = open(path)
-    spawn_table = json.load(f)[0]
-
-    # Current final floor is FLOOR 8. Keep spawning unchanged for floors beyond this.
-    if engine.game_world.current_floor > 8:
-        floor_value = 8
-    else:
-        floor_value = engine.game_world.current_floor
-    spawn_table = spawn_table[f"{floor_value}"]
-
-    entity_types = []
-    entity_weighted_chances = {}
-    for key, value in spawn_table.items():
-        entity_types.append(value[0])
-        entity_weighted_chances[key] = value[1]
+    """Draw a number of monsters and their data file types from a spawn table for the current floor."""
+    return get_spawn_table(path).sample(engine.game_world.current_floor, number_of_entities,
+                                        engine.rng.spawning.numpy)
 
-    entities = list(entity_weighted_chances.keys())
-    entity_weighted_chance_values = list(entity_weighted_chances.values())
 
-    # Generate a random selection across the item and item type arrays simultaneously
-    idx = random.choices(np.arange(len(entities)),
-                         weights=entity_weighted_chance_values, k=number_of_entities)
-    # Now construct the lists of item and type
-    chosen_monsters = []
-    chosen_types = []
-    for i in idx:
-        chosen_monsters.append(entities[i])
-        chosen_types.append(entity_types[i])
-
-    return chosen_monsters, chosen_types
+def get_items_at_random(engine: Engine, path: str, number_of_entities: int) -> [List[str], List[str]]:
+    """Draw a number of items and their data file types from a spawn table for the current floor."""
+    return get_spawn_table(path).sample(engine.game_world.current_floor, number_of_entities,
+                                        engine.rng.spawning.numpy)
 
 
-def get_items_at_random(engine: Engine, path: str, number_of_entities: int) -> [List[str], List[str]]:
+def get_static_objects_at_random(engine: Engine, path: str, floor_number: int) -> List[parts.entity.StaticObject]:
     # Load drop table for current floor
-    f = open(path)
-    spawn_table = json.load(f)[0]
-
-    # Current final floor is FLOOR 8. Keep spawning unchanged for floors beyond this.
-    if engine.game_world.current_floor > 8:
-        floor_value = 8
-    else:
-        floor_value = engine.game_world.current_floor
-    spawn_table = spawn_table[f"{floor_value}"]
+    with open(path, 'r', encoding='utf-8') as f:
+        spawn_table = json.load(f)[0]
+    return spawn_table
 
-    entity_types = []
-    entity_weighted_chances = {}
-    for key, value in spawn_table.items():
-        entity_types.append(value[0])
-        entity_weighted_chances[key] = value[1]
 
-    entities = list(entity_weighted_chances.keys())
-    entity_weighted_chance_values = list(entity_weighted_chances.values())
+def generate_dungeon(engine: Engine, hooks: Optional[List[StageHook]] = None) -> SimpleGameMap:
+    """
+    Generate a new dungeon map by running each of the stages listed by the current biome in turn, see GameWorld.
+    The given hooks are called before and after every stage, e.g. to time them.
+    """
+    game_world = engine.game_world
+    dungeon = SimpleGameMap(engine, game_world.map_width, game_world.map_height, entities=[engine.player])
+    return run_stages(dungeon, engine, [generation_stages[name] for name in game_world.stages], hooks)
 
-    # Generate a random selection across the item and item type arrays simultaneously
-    idx = random.choices(np.arange(len(entities)),
-                         weights=entity_weighted_chance_values, k=number_of_entities)
-    # Now construct the lists of item and type
-    chosen_items = []
-    chosen_types = []
-    for i in idx:
-        chosen_items.append(entities[i])
-        chosen_types.append(entity_types[i])
 
-    return chosen_items, chosen_types
+def place_player(dungeon: SimpleGameMap, engine: Engine) -> None:
+    engine.player.place(*dungeon.get_random_walkable_nontunnel_tile(engine.rng.spawning), dungeon)
 
 
-def get_static_objects_at_random(engine: Engine, path: str, floor_number: int) -> List[parts.entity.StaticObject]:
-    # Load drop table for current floor
-    f = open(path)
-    spawn_table = json.load(f)[0]
-    return spawn_table
+def add_accessible(dungeon: SimpleGameMap, engine: Engine) -> None:
+    dungeon.calc_accessible()
 
 
-def generate_dungeon(max_rooms: int, room_min_size: int, room_max_size: int, map_width: int, map_height: int,
-                     engine: Engine) -> SimpleGameMap:
-    """
-    Generate a new dungeon map.
-    """
-    player = engine.player
-    cave_smoothing = engine.game_world.cave_smoothing
-    cave_p = engine.game_world.cave_p
-
-    tries = 1
-    while tries <= 10:
-        # Initialize map
-        dungeon = SimpleGameMap(engine, map_width, map_height, entities=[player])
-        if engine.game_world.caves:
-            dungeon = add_caves(dungeon, smoothing=cave_smoothing, p=cave_p)
-        if engine.game_world.rooms:
-            dungeon = add_rooms(dungeon, max_rooms, room_min_size, room_max_size)
-        if engine.game_world.erode:
-            dungeon = erode(dungeon, 1)
-
-        # Add rocks/water
-        dungeon = add_rubble(dungeon, events=7)
-        dungeon = add_hazards(dungeon, floods=5, holes=3)
-        dungeon = add_features(dungeon)
-
-        # Place player
-        engine.player.place(*dungeon.get_random_walkable_nontunnel_tile(), dungeon)
-
-        # Populate dungeon
-        place_flora(dungeon, engine, areas=3)
-        place_fauna(dungeon, engine)
-        place_npcs(dungeon, engine)
-        place_items(dungeon, engine)
-        place_static_objects(dungeon, engine)
-
-        # Finally, add stairs
-        dungeon = add_stairs(dungeon)
-        if isinstance(dungeon, SimpleGameMap):
-            # Mapgen successful, use this floor
-            dungeon.accessible = dungeon.calc_accessible()
-            return dungeon
-        elif isinstance(dungeon, MapGenError):
-            # Mapgen unsuccessful, try again until max tries are reached
-            if logging.DEBUG >= logging.root.level:
-                print(f"DEBUG: Floor generation failed. Attempt: {tries}.", config.colour.debug)
-            tries += 1
-            continue
-
-    # Something went wrong with mapgen, sysexit
-    raise FatalMapGenError(f"Dungeon generation failed! Reason: floor attempts exceeded.")
-
-
-def place_flora(dungeon: SimpleGameMap, engine: Engine, areas: int) -> None:
+def place_flora(dungeon: SimpleGameMap, engine: Engine) -> None:
     """
     Fill the current floor with plants, both hostile and decorative.
-    A cellular automata method is used to generate an area that plants may spawn in, which is then placed onto the
-    floor and populated.
+    Plants spawn within the verdant areas grown by add_verdant_areas, and only spill over onto other free tiles once
+    every verdant tile is taken.
     """
     current_floor = engine.game_world.current_floor
     max_plants = get_max_value_for_floor(max_plants_by_floor, current_floor)
-    number_of_plants = random.randint(int(max_plants / 2), max_plants)
+    number_of_plants = engine.rng.spawning.randint(int(max_plants / 2), max_plants)
 
     plants, plant_types = get_monsters_at_random(engine, 'data/monsters/spawn_table_plants.json', number_of_plants)
 
-    # Generate cellular automata areas
-    area_size = random.randint(5, 10)
-    p = 40
-    verdant_array = []
+    # Give each plant its own verdant tile where possible
+    paths = [f"data/monsters/{plant_type}.json" for plant_type in plant_types]
+    candidates = spawn_candidates(dungeon)
+    spawn_batch(dungeon, monster_prototypes, paths, plants, dungeon.verdant & candidates, engine.rng.spawning,
+                fallback=candidates)
+
+
+def add_verdant_areas(dungeon: SimpleGameMap, areas: int, p: int = 40) -> SimpleGameMap:
+    """
+    Grow patches of verdant floor across the map, which make up dungeon.verdant.
+    All patches are seeded at once within squares around random walkable tiles, where p is the chance of a tile
+    within a square staying bare. Each growth pass then turns any tile with at least 5 verdant neighbours verdant.
+    Hazards such as holes, water and waterfalls are never overgrown.
+    """
+    rng = dungeon.engine.rng.mapgen.numpy
+    area_size = rng.integers(5, 11)
+    half_size = area_size // 2
+    growable = ~dungeon.hazards
+
+    patches = np.full(dungeon.tiles.shape, fill_value=False, order="F")
+    start_x, start_y = sample_coordinates(dungeon.walkable, areas, rng)
+    for x, y in zip(start_x, start_y):
+        patches[max(x - half_size, 1):x + half_size, max(y - half_size, 1):y + half_size] = True
+
+    verdant = patches & growable & (rng.integers(0, 101, size=dungeon.tiles.shape) > p)
     for area in range(areas):
-        # Get a random walkable tile within the dungeon
-        walkable = np.nonzero(dungeon.tiles['walkable'])
-        index = random.randint(0, len(walkable[0]) - 1)
-        start_x = walkable[0][index]
-        start_y = walkable[1][index]
-        x_arr = np.arange(start_x - int(area_size / 2), (start_x + int(area_size / 2)))
-        y_arr = np.arange(start_y - int(area_size / 2), (start_y + int(area_size / 2)))
-
-        # Make sure that values are within the game map
-        x_arr = x_arr[np.where(np.logical_and(x_arr > 0, x_arr < dungeon.width))]
-        y_arr = y_arr[np.where(np.logical_and(y_arr > 0, y_arr < dungeon.height))]
-
-        # Randomly populate with greenery
-        for x in x_arr:
-            for y in y_arr:
-                if random.randint(0, 100) > p:
-                    # Select a few random locations to become verdant
-                    if not dungeon.tiles[x, y]['name'] == 'hole' and not dungeon.tiles[x, y]['name'] == 'water':
-                        dungeon.tiles[x, y] = random.choice(maps.tiles.verdant_tiles_1)
-                        verdant_array.append([x, y])
-
-        for x in range(dungeon.width):
-            for y in range(dungeon.height):
-                verdant = 0
-                for nx, ny in dungeon.find_neighbours(x, y):
-                    if 'verdant' in dungeon.tiles[nx, ny]['name']:
-                        verdant += 1
-                if verdant >= 5:
-                    dungeon.tiles[x, y] = random.choice(maps.tiles.verdant_tiles_1)
-
-    for i in range(len(plants)):
-        # Random verdant tile
-        x, y = random.choice(verdant_array)
-
-        # Find Euclidean distance between monster spawn and player
-        player_x = int(dungeon.engine.player.x)
-        player_y = int(dungeon.engine.player.y)
-        spawn_dist = np.sqrt((x - player_x) ** 2 + (y - player_y) ** 2)
-
-        # Enemies should not spawn in player pov!
-        if spawn_dist <= 10:
-            continue
-
-        # Spawn in free, non-blocked location
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities) and dungeon.tiles[x, y]['walkable']:
-            plant = copy.deepcopy(create_monster_from_json(f"data/monsters/{plant_types[i]}.json", plants[i]))
-            plant.spawn(dungeon, x, y)
+        verdant |= (count_neighbours(verdant) >= 5) & growable
+    scatter_tiles(dungeon, verdant, maps.tiles.verdant_tiles_1, rng)
+
+    return dungeon
 
 
 def place_fauna(dungeon: SimpleGameMap, engine: Engine) -> None:
     current_floor = engine.game_world.current_floor
     max_monsters = get_max_value_for_floor(max_monsters_by_floor, current_floor)
-    number_of_monsters = random.randint(int(max_monsters / 2), max_monsters)
+    number_of_monsters = engine.rng.spawning.randint(int(max_monsters / 2), max_monsters)
 
-    # Spawn monsters
+    # Spawn monsters, each on its own free tile away from the player
     monsters, monster_types = get_monsters_at_random(engine, 'data/monsters/spawn_table_monsters.json',
                                                      number_of_monsters)
-    for i in range(len(monsters)):
-        # Get the indices of tiles which are walkable
-        x, y = dungeon.get_random_walkable_tile()
-
-        # Find Euclidean distance between monster spawn and player
-        player_x = int(dungeon.engine.player.x)
-        player_y = int(dungeon.engine.player.y)
-        spawn_dist = np.sqrt((x - player_x) ** 2 + (y - player_y) ** 2)
-
-        # Enemies should not spawn in player pov!
-        if spawn_dist <= 10:
-            continue
-
-        # Spawn in free, non-blocked location
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            monster = copy.deepcopy(create_monster_from_json(f"data/monsters/{monster_types[i]}.json", monsters[i]))
-            if monster.name == "Risen Sacrifice":
-                monster.fighter.hp = random.randint(4, 8)
-            monster.spawn(dungeon, x, y)
+    paths = [f"data/monsters/{monster_type}.json" for monster_type in monster_types]
+    for monster in spawn_batch(dungeon, monster_prototypes, paths, monsters, spawn_candidates(dungeon),
+                               engine.rng.spawning):
+        if monster.name == "Risen Sacrifice":
+            monster.fighter.hp = engine.rng.spawning.randint(4, 8)
 
 
 def place_npcs(dungeon: SimpleGameMap, engine: Engine) -> None:
     # Spawn NPCs depending upon floor conditions
     if engine.game_world.current_floor == 1:
-        x, y = dungeon.get_random_walkable_nontunnel_tile()
-        npc = copy.deepcopy(create_monster_from_json(f"data/monsters/npcs.json", "gilbert"))
-        npc.spawn(dungeon, x, y)
+        x, y = dungeon.get_random_walkable_nontunnel_tile(engine.rng.spawning)
+        monster_prototypes.get(f"data/monsters/npcs.json", "gilbert").spawn(dungeon, x, y)
 
 
 def place_items(dungeon: SimpleGameMap, engine: Engine) -> None:
     current_floor = engine.game_world.current_floor
     max_items = get_max_value_for_floor(max_items_by_floor, current_floor)
-    number_of_items = random.randint(int(max_items / 2), max_items)
+    number_of_items = engine.rng.spawning.randint(int(max_items / 2), max_items)
 
+    # Items may be found right next to the player, but never on top of another entity
     items, item_types = get_items_at_random(engine, 'data/items/spawn_table_items.json', number_of_items)
-
-    for i in range(len(items)):
-        # Get random walkable tile
-        x, y = dungeon.get_random_walkable_tile()
-
-        # Spawn in free, non-blocked location
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            item = copy.deepcopy(create_item_from_json(f"data/items/{item_types[i]}.json", items[i]))
-            item.spawn(dungeon, x, y)
+    paths = [f"data/items/{item_type}.json" for item_type in item_types]
+    spawn_batch(dungeon, item_prototypes, paths, items, spawn_candidates(dungeon, min_player_distance=0),
+                engine.rng.spawning)
 
 
 def place_static_objects(dungeon: SimpleGameMap, engine: Engine) -> None:
@@ -328,20 +201,53 @@ def place_static_objects(dungeon: SimpleGameMap, engine: Engine) -> None:
     static_objects = get_static_objects_at_random(engine, 'data/static_objects/spawn_table_objects.json', current_floor)
 
     # For now simply spawn one sludge fountain per floor
-    x, y = dungeon.get_random_unoccupied_nonfov_tile()
+    x, y = dungeon.get_random_unoccupied_nonfov_tile(engine.rng.spawning)
 
-    static_object = copy.deepcopy(
-        create_static_object_from_json(f"data/static_objects/core_objects.json", 'sludge_fountain'))
+    static_object = static_object_prototypes.get(f"data/static_objects/core_objects.json", 'sludge_fountain')
     static_object.spawn(dungeon, x, y)
 
 
-def tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+def spawn_candidates(dungeon: SimpleGameMap, min_player_distance: float = 10) -> np.ndarray:
+    """
+    Return a mask of the tiles which new entities may be spawned upon: walkable tiles which are not holes, are not
+    occupied by any other entity, and lie more than min_player_distance tiles from the player.
+    """
+    candidates = dungeon.walkable & ~dungeon.has_flag(TileFlag.Hole)
+    if dungeon.entities:
+        x, y = np.array([(entity.x, entity.y) for entity in dungeon.entities]).T
+        candidates[x, y] = False
+    if min_player_distance > 0:
+        player = dungeon.engine.player
+        x, y = np.ogrid[:dungeon.width, :dungeon.height]
+        candidates &= (x - player.x) ** 2 + (y - player.y) ** 2 > min_player_distance ** 2
+    return candidates
+
+
+def spawn_batch(dungeon: SimpleGameMap, registry: PrototypeRegistry, paths: List[str], names: List[str],
+                candidates: np.ndarray, rng: RandomStream,
+                fallback: Optional[np.ndarray] = None) -> List[parts.entity.Entity]:
+    """
+    Spawn a batch of entities from their prototypes, each upon a different tile drawn at random from a candidate mask.
+    If there are fewer candidate tiles than entities, the rest are spawned upon tiles drawn from the fallback mask.
+    Raises MapGenError, without spawning anything, if there are still not enough tiles for the whole batch.
+    """
+    x, y = sample_coordinates(candidates, len(names), rng.numpy)
+    if len(x) < len(names) and fallback is not None:
+        extra_x, extra_y = sample_coordinates(fallback & ~candidates, len(names) - len(x), rng.numpy)
+        x, y = np.concatenate((x, extra_x)), np.concatenate((y, extra_y))
+    if len(x) < len(names):
+        raise MapGenError(f"Only {len(x)} free tiles to spawn a batch of {len(names)} entities upon.")
+    return [registry.get(path, name).spawn(dungeon, x, y)
+            for path, name, x, y in zip(paths, names, x.tolist(), y.tolist())]
+
+
+def tunnel_between(start: Tuple[int, int], end: Tuple[int, int], rng: RandomStream) -> Iterator[Tuple[int, int]]:
     """
     Return an L-shaped tunnel between these two points.
     """
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:  # 50% chance.
+    if rng.random() < 0.5:  # 50% chance.
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -358,13 +264,14 @@ def tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tup
 def add_rooms(dungeon: SimpleGameMap, max_rooms: int,
               room_min_size: int, room_max_size: int) -> SimpleGameMap:
     rooms: List[RectangularRoom] = []
+    rng = dungeon.engine.rng.mapgen
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
@@ -377,7 +284,7 @@ def add_rooms(dungeon: SimpleGameMap, max_rooms: int,
         # Dig out this rooms inner area.
         for tile_i in range(new_room.x1, new_room.x2):
             for tile_j in range(new_room.y1, new_room.y2):
-                dungeon.tiles[tile_i, tile_j] = random.choice(maps.tiles.floor_tiles_1)
+                dungeon.tiles[tile_i, tile_j] = rng.choice(maps.tiles.floor_tiles_1)
 
         # if len(rooms) == 0:
         # The first room, where the player starts.
@@ -386,9 +293,9 @@ def add_rooms(dungeon: SimpleGameMap, max_rooms: int,
 
         if not len(rooms) == 0:
             # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
+            for x, y in tunnel_between(rooms[-1].center, new_room.center, rng):
                 dungeon.tunnel[x, y] = True
-                dungeon.tiles[x, y] = random.choice(maps.tiles.floor_tiles_1)
+                dungeon.tiles[x, y] = rng.choice(maps.tiles.floor_tiles_1)
 
         # Provide room/corridor indexing to gamemap for later use (exclude player room)
         dungeon.rooms.append(new_room.tile_indices)
@@ -404,124 +311,118 @@ def add_caves(dungeon: SimpleGameMap, smoothing: int, p: int) -> SimpleGameMap:
     A chamber filled with random-sized, sprawling cave rooms, generated using an automata technique.
     p is the probability of a cave sector being created. Smoothing values about 4 do nothing, below 4 cause
     more rugged caves.
+    The automaton is evaluated over the whole grid at once: every smoothing pass counts the solid neighbours of all
+    tiles simultaneously and then applies the birth/death rules as boolean masks.
     """
-    map_width = dungeon.width
-    map_height = dungeon.height
-    for x in range(map_width):
-        for y in range(map_height):
-            if random.randint(0, 100) > p:
-                # Select a few random locations to be turned into a floor
-                dungeon.tiles[x, y] = random.choice(maps.tiles.floor_tiles_1)
+    rng = dungeon.engine.rng.mapgen.numpy
+
+    # Select a few random locations to be turned into a floor
+    floor = rng.integers(0, 101, size=dungeon.tiles.shape) > p
+    scatter_tiles(dungeon, floor, maps.tiles.floor_tiles_1, rng)
+
+    border = np.full(dungeon.tiles.shape, fill_value=False, order="F")
+    border[[0, -1], :] = True
+    border[:, [0, -1]] = True
 
     for i in range(smoothing):
-        for x in range(map_width):
-            for y in range(map_height):
-                if x == 0 or x == map_width - 1 or y == 0 or y == map_height - 1:
-                    dungeon.tiles[x, y] = maps.tiles.wall
-                touching_empty_space = 0
-                for nx, ny in dungeon.find_neighbours(x, y):
-                    if not dungeon.tiles[nx, ny]['walkable']:
-                        touching_empty_space += 1
-                if touching_empty_space >= 5 and not dungeon.tunnel[x, y]:
-                    dungeon.tiles[x, y] = maps.tiles.wall
-                elif touching_empty_space <= 2:
-                    dungeon.tiles[x, y] = random.choice(maps.tiles.floor_tiles_1)
-                if x == 0 or x == map_width - 1 or y == 0 or y == map_height - 1:
-                    dungeon.tiles[x, y] = maps.tiles.wall
+        dungeon.tiles[border] = maps.tiles.wall
+        touching_empty_space = count_neighbours(~dungeon.walkable)
+
+        # Tunnels dug by add_rooms are never filled back in
+        dungeon.tiles[(touching_empty_space >= 5) & ~dungeon.tunnel] = maps.tiles.wall
+        scatter_tiles(dungeon, touching_empty_space <= 2, maps.tiles.floor_tiles_1, rng)
+        dungeon.tiles[border] = maps.tiles.wall
 
     return dungeon
 
 
-def add_rubble(dungeon: SimpleGameMap, events: int) -> SimpleGameMap:
+def scatter_tiles(dungeon: SimpleGameMap, mask: np.ndarray, tiles: List[int],
+                  rng: np.random.Generator) -> None:
     """
-    Add tiles of impassable rubble which may be removed via explosions, digging, etc.
+    Replace every tile selected by a boolean mask with a random variant from the given list of tile IDs.
     """
+    variants = np.array(tiles, dtype=np.uint8)
+    dungeon.tiles[mask] = variants[rng.integers(0, len(variants), size=np.count_nonzero(mask))]
 
-    tries = 0
-    while tries < events:
-        x = random.choice(range(dungeon.width))
-        y = random.choice(range(dungeon.height))
-        if x == dungeon.engine.player.x and y == dungeon.engine.player.y:
-            continue
-        if dungeon.tiles[x, y]['walkable'] and not dungeon.tunnel[x, y]:
-            # Choose n random tiles within 5x5 area
-            pile_area = random.randint(3, 5)
-            pile_size = random.randint((int(pile_area ** 2 / 2)), pile_area ** 2)
-            x_arr = np.arange(x - 2, x + 2)
-            y_arr = np.arange(y - 2, y + 2)
 
-            for placement in range(pile_size):
-                try:
-                    dungeon.tiles[random.choice(x_arr), random.choice(y_arr)] = maps.tiles.rubble
-                except IndexError:
-                    continue
+def add_rubble(dungeon: SimpleGameMap, events: int) -> SimpleGameMap:
+    """
+    Add tiles of impassable rubble which may be removed via explosions, digging, etc.
+    """
+    rng = dungeon.engine.rng.mapgen.numpy
 
-            tries += 1
+    # Choose n random tiles within 5x5 area of each pile
+    x, y = sample_coordinates(dungeon.walkable & ~dungeon.tunnel, events, rng)
+    pile_area = rng.integers(3, 6, size=len(x))
+    pile_size = rng.integers(pile_area ** 2 // 2, pile_area ** 2 + 1)
+    stamp_tiles(dungeon, x, y, pile_size, maps.tiles.rubble, rng)
 
     return dungeon
 
 
-def add_stairs(dungeon: SimpleGameMap):
+def sample_coordinates(mask: np.ndarray, number: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Place stairs in random tile in random room that the player can access.
+    Return the x and y coordinates of up to n distinct tiles drawn at random from a boolean mask.
     """
+    x, y = np.nonzero(mask)
+    index = rng.choice(len(x), size=min(number, len(x)), replace=False)
+    return x[index], y[index]
 
-    attempts = 0
-    # Attempt to place stairs in accessible location n times before throwing an error.
-    while attempts < 25:
-        # Get random walkable tile
-        stairs_location = dungeon.get_random_walkable_nontunnel_tile()
-
-        # Check if there exists a path to the stairs
-        cost = np.array(dungeon.tiles["walkable"], dtype=np.int8)
 
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-        pathfinder = tcod.path.Pathfinder(graph)
+def stamp_tiles(dungeon: SimpleGameMap, x: np.ndarray, y: np.ndarray, sizes: np.ndarray, tile: int,
+                rng: np.random.Generator) -> None:
+    """
+    Scatter a number of copies of a tile around each (x, y) position, each copy landing on a random tile within
+    the 4x4 area spanning two tiles behind and one tile ahead of the position. Copies outside the map are dropped.
+    """
+    stamp_x = np.repeat(x, sizes) + rng.integers(-2, 2, size=sizes.sum())
+    stamp_y = np.repeat(y, sizes) + rng.integers(-2, 2, size=sizes.sum())
+    in_bounds = (stamp_x >= 0) & (stamp_x < dungeon.width) & (stamp_y >= 0) & (stamp_y < dungeon.height)
+    dungeon.tiles[stamp_x[in_bounds], stamp_y[in_bounds]] = tile
 
-        pathfinder.add_root((dungeon.engine.player.x, dungeon.engine.player.y))  # Start position.
-        path: List[List[int]] = pathfinder.path_to(stairs_location)[1:].tolist()
 
-        if len(path) > 20:
-            if logging.DEBUG >= logging.root.level:
-                dungeon.engine.message_log.add_message(f"DEBUG: Stairs placed at ({stairs_location}).",
-                                                       config.colour.debug)
-            dungeon.tiles[stairs_location] = maps.tiles.down_stairs
-            dungeon.downstairs_location = stairs_location
-            return dungeon
-        elif 0 > len(path) <= 20:
-            attempts += 1
-            if logging.DEBUG >= logging.root.level:
-                dungeon.engine.message_log.add_message(f"DEBUG: Stair placement failed. Tile too close. "
-                                                       f"(Attempt {attempts}).", config.colour.debug)
-            continue
-        else:
-            attempts += 1
-            if logging.DEBUG >= logging.root.level:
-                dungeon.engine.message_log.add_message(f"DEBUG: Stair placement failed. Invalid tile. "
-                                                       f"(Attempt {attempts}).", config.colour.debug)
-            continue
+def add_stairs(dungeon: SimpleGameMap, min_distance: int = 20) -> SimpleGameMap:
+    """
+    Place stairs on a random tile accessible to the player from their start location, more than min_distance moves
+    away. A single distance map from the player covers every candidate tile, and is kept on the map for later use.
+    If no tile is far enough away, the stairs are placed on the furthest reachable tile instead. Raises MapGenError if
+    the player cannot walk anywhere at all.
+    """
+    player = dungeon.engine.player
+    dungeon.distance_from_start = dungeon.calc_distance_map(player.x, player.y)
+
+    reachable = dungeon.accessible
+    candidates = reachable & dungeon.walkable & ~dungeon.has_flag(TileFlag.Hole) & ~dungeon.tunnel
+    if not candidates.any():
+        candidates = reachable
+    if not (candidates & (dungeon.distance_from_start > 0)).any():
+        raise MapGenError(f"No tile reachable from the player's start location ({player.x}, {player.y}).")
+    far_enough = candidates & (dungeon.distance_from_start > min_distance)
+    if far_enough.any():
+        x, y = sample_coordinates(far_enough, 1, dungeon.engine.rng.mapgen.numpy)
+        stairs_location = (int(x[0]), int(y[0]))
+    else:
+        furthest = np.where(candidates, dungeon.distance_from_start, -1).argmax()
+        stairs_location = tuple(int(i) for i in np.unravel_index(furthest, candidates.shape))
 
-    return MapGenError("MapGen aborted. Reason: Could not place stairs (Maximum attempts exceeded).",
-                       config.colour.debug)
+    if logging.DEBUG >= logging.root.level:
+        dungeon.engine.message_log.add_message(f"DEBUG: Stairs placed at ({stairs_location}).", config.colour.debug)
+    dungeon.set_tile(*stairs_location, maps.tiles.down_stairs)
+    dungeon.downstairs_location = stairs_location
+    return dungeon
 
 
 def erode(dungeon: SimpleGameMap, smoothing: int) -> SimpleGameMap:
     """
     A tool for helping to increase the erosion of an already-generated map.
     """
+    rng = dungeon.engine.rng.mapgen.numpy
     for i in range(smoothing):
-        for x in range(dungeon.width):
-            for y in range(dungeon.height):
-                touching_empty_space = 0
-                for nx, ny in dungeon.find_neighbours(x, y):
-                    if not dungeon.tiles[nx][ny]['walkable'] and not dungeon.tiles[nx][ny]['transparent']:
-                        touching_empty_space += 1
-                if touching_empty_space >= 5 and not dungeon.tunnel[x, y]:
-                    dungeon.tiles[x][y] = maps.tiles.wall
-                elif touching_empty_space <= 3:
-                    dungeon.tiles[x][y] = random.choice(maps.tiles.floor_tiles_1)
-                if x == 0 or x == dungeon.width - 1 or y == 0 or y == dungeon.height - 1:
-                    dungeon.tiles[x][y] = maps.tiles.wall
+        touching_empty_space = count_neighbours(~dungeon.walkable & ~dungeon.transparent)
+        dungeon.tiles[(touching_empty_space >= 5) & ~dungeon.tunnel] = maps.tiles.wall
+        scatter_tiles(dungeon, touching_empty_space <= 3, maps.tiles.floor_tiles_1, rng)
+        dungeon.tiles[[0, -1], :] = maps.tiles.wall
+        dungeon.tiles[:, [0, -1]] = maps.tiles.wall
 
     return dungeon
 
@@ -531,14 +432,8 @@ def spill_liquid(dungeon: SimpleGameMap, smoothing: int) -> SimpleGameMap:
     Erosion tool for liquids to make bodies of liquid more uniform in their distribution.
     """
     for i in range(smoothing):
-        for x in range(dungeon.width):
-            for y in range(dungeon.height):
-                touching_liquid = 0
-                for nx, ny in dungeon.find_neighbours(x, y):
-                    if dungeon.tiles[nx, ny]['name'] == 'water':
-                        touching_liquid += 1
-                if touching_liquid >= 4 and not dungeon.tunnel[x, y]:
-                    dungeon.tiles[x][y] = maps.tiles.water
+        touching_liquid = count_neighbours(dungeon.liquid)
+        dungeon.tiles[(touching_liquid >= 4) & ~dungeon.tunnel] = maps.tiles.water
 
     return dungeon
 
@@ -547,57 +442,31 @@ def add_hazards(dungeon: SimpleGameMap, floods: int, holes: int) -> SimpleGameMa
     """
     Add hazards such as liquids to the map
     """
-
-    # Add water to some rooms
-    i = 0
-    while i <= floods:
-        # Random walkable tile
-        start_x, start_y = dungeon.get_random_walkable_nontunnel_tile()
-
-        # Create first water tile
-        dungeon.tiles[start_x, start_y] = maps.tiles.water
-
-        # Decide spill size
-        spill_size = random.randint(4, 16)
-        j = 0
-        new_x = start_x
-        new_y = start_y
-        while j <= spill_size:
-            # Spill to a tile next to initial tile
-            new_x += random.randint(-1, 1)
-            new_y += random.randint(-1, 1)
-            try:
-                dungeon.tiles[new_x, new_y] = maps.tiles.water
-            except IndexError:
-                pass
-            j += 1
-        i += 1
+    rng = dungeon.engine.rng.mapgen.numpy
+
+    # Add water to some rooms. Each flood is a random walk that spills outwards from a walkable tile.
+    candidates = dungeon.walkable & ~dungeon.has_flag(TileFlag.Hole) & ~dungeon.tunnel
+    start_x, start_y = sample_coordinates(candidates, floods + 1, rng)
+    spill_size = rng.integers(4, 17, size=len(start_x)) + 1
+    steps = rng.integers(-1, 2, size=(spill_size.sum(), 2))
+
+    # Cumulative sum of the steps, restarted at the beginning of each walk
+    walk_starts = np.cumsum(spill_size) - spill_size
+    walked = np.cumsum(steps, axis=0)
+    walked -= np.repeat(walked[walk_starts] - steps[walk_starts], spill_size, axis=0)
+    spill_x = np.concatenate((start_x, np.repeat(start_x, spill_size) + walked[:, 0]))
+    spill_y = np.concatenate((start_y, np.repeat(start_y, spill_size) + walked[:, 1]))
+    in_bounds = (spill_x >= 0) & (spill_x < dungeon.width) & (spill_y >= 0) & (spill_y < dungeon.height)
+    dungeon.tiles[spill_x[in_bounds], spill_y[in_bounds]] = maps.tiles.water
 
     # Make bodies of water more uniform
     dungeon = spill_liquid(dungeon, smoothing=1)
 
-    # Add holes across the dungeon
-    tries = 0
-    while tries < holes:
-        x = random.choice(range(dungeon.width))
-        y = random.choice(range(dungeon.height))
-
-        if dungeon.tiles[x, y]['walkable'] and not dungeon.tunnel[x, y]:
-            # Choose n random tiles within 5x5 area
-            hole_area = random.randint(3, 5)
-            hole_size = random.randint((int(hole_area ** 2 / 4)), hole_area ** 2)
-            x_arr = np.arange(x - 2, x + 2)
-            y_arr = np.arange(y - 2, y + 2)
-
-            for placement in range(hole_size):
-                try:
-                    hole_x = random.choice(x_arr)
-                    hole_y = random.choice(y_arr)
-                    dungeon.tiles[hole_x, hole_y] = maps.tiles.hole
-                except IndexError:
-                    continue
-
-            tries += 1
+    # Add holes across the dungeon, choosing n random tiles within a 5x5 area of each
+    x, y = sample_coordinates(dungeon.walkable & ~dungeon.tunnel, holes, rng)
+    hole_area = rng.integers(3, 6, size=len(x))
+    hole_size = rng.integers(hole_area ** 2 // 4, hole_area ** 2 + 1)
+    stamp_tiles(dungeon, x, y, hole_size, maps.tiles.hole, rng)
 
     return dungeon
 
@@ -608,11 +477,50 @@ def add_features(dungeon: SimpleGameMap) -> SimpleGameMap:
     """
 
     # If water touches a hole, turn it into a waterfall
-    for x in range(dungeon.width):
-        for y in range(dungeon.height):
-            for nx, ny in dungeon.find_neighbours(x, y):
-                if dungeon.tiles[x, y]['name'] == 'water' and dungeon.tiles[nx, ny]['name'] == 'hole':
-                    dungeon.tiles[x, y] = maps.tiles.waterfall
+    touching_hole = count_neighbours(dungeon.has_flag(TileFlag.Hole)) > 0
+    dungeon.tiles[dungeon.liquid & touching_hole] = maps.tiles.waterfall
+
+    return dungeon
+
+
+def connect_regions(dungeon: SimpleGameMap, min_size: int = 8) -> SimpleGameMap:
+    """
+    Make every walkable tile of the map reachable from every other. The walkable area is labelled into connected
+    regions once. Regions smaller than min_size tiles are filled in with wall, and each remaining region is joined to
+    the largest by a straight corridor, dug from whichever of its tiles lies closest to the regions already joined.
+    """
+    regions, number_of_regions = ndimage.label(dungeon.walkable, structure=np.ones((3, 3)))
+    if number_of_regions <= 1:
+        return dungeon
+
+    sizes = np.bincount(regions.ravel())
+    sizes[0] = 0
+    tiny = sizes < min_size
+    tiny[0] = False
+    filled = tiny[regions]
+    dungeon.tiles[filled] = maps.tiles.wall
+    dungeon.tunnel[filled] = False
+
+    joined = regions == sizes.argmax()
+    remaining = [region for region in range(1, number_of_regions + 1) if not tiny[region] and sizes[region] and
+                 region != sizes.argmax()]
+    rng = dungeon.engine.rng.mapgen.numpy
+    while remaining:
+        distance, (nearest_x, nearest_y) = ndimage.distance_transform_edt(~joined, return_indices=True)
+
+        # Join the closest region first, as it may then offer a shorter route to the others
+        closest = remaining.pop(int(np.argmin(ndimage.minimum(distance, regions, remaining))))
+        region = regions == closest
+        start_x, start_y = np.unravel_index(np.where(region, distance, np.inf).argmin(), region.shape)
+        end = (nearest_x[start_x, start_y], nearest_y[start_x, start_y])
+
+        corridor = np.full(dungeon.tiles.shape, fill_value=False, order="F")
+        corridor_x, corridor_y = tcod.los.bresenham((start_x, start_y), end).T
+        corridor[corridor_x, corridor_y] = True
+        corridor &= ~dungeon.walkable
+        scatter_tiles(dungeon, corridor, maps.tiles.floor_tiles_1, rng)
+        dungeon.tunnel |= corridor
+        joined |= region | corridor
 
     return dungeon
 
@@ -658,3 +566,27 @@ class RectangularRoom:
                 and self.y1 <= other.y2
                 and self.y2 >= other.y1
         )
+
+
+# Every stage which a biome may list, by name. The map is checkpointed after the slower stages which shape the floor,
+# so that a later stage which fails is retried from there.
+generation_stages: Dict[str, Stage] = {stage.name: stage for stage in [
+    Stage("caves", lambda dungeon, engine: add_caves(dungeon, smoothing=engine.game_world.cave_smoothing,
+                                                     p=engine.game_world.cave_p), checkpoint=True),
+    Stage("rooms", lambda dungeon, engine: add_rooms(dungeon, engine.game_world.max_rooms,
+                                                     engine.game_world.room_min_size, engine.game_world.room_max_size)),
+    Stage("erode", lambda dungeon, engine: erode(dungeon, 1), checkpoint=True),
+    Stage("rubble", lambda dungeon, engine: add_rubble(dungeon, events=7)),
+    Stage("hazards", lambda dungeon, engine: add_hazards(dungeon, floods=5, holes=3)),
+    Stage("features", lambda dungeon, engine: add_features(dungeon)),
+    Stage("verdant", lambda dungeon, engine: add_verdant_areas(dungeon, areas=3)),
+    Stage("connectivity", lambda dungeon, engine: connect_regions(dungeon), checkpoint=True),
+    Stage("player", place_player),
+    Stage("flora", place_flora),
+    Stage("fauna", place_fauna),
+    Stage("npcs", place_npcs),
+    Stage("items", place_items),
+    Stage("static_objects", place_static_objects),
+    Stage("stairs", lambda dungeon, engine: add_stairs(dungeon)),
+    Stage("accessible", add_accessible)
+]}
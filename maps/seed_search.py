@@ -0,0 +1,233 @@
+"""
+Searching many seeds for floors which meet a set of requirements, e.g. for curated daily runs or for tests which need a
+floor of a particular shape. Candidate floors are generated across a pool of worker processes, each worker generating
+a whole chunk of seeds so that the cost of starting it is only paid once, and are then measured and ranked together.
+Run from the repository root with, e.g.:
+
+    python -m maps.seed_search --depth 3 --candidates 500 --min-stairs-distance 40 --min-verdant-regions 3
+    python -m maps.seed_search --depth 1 --candidates 100 --top 3 --save floors/
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import lzma
+import multiprocessing
+import os
+import pickle
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, TYPE_CHECKING
+
+import numpy as np
+from scipy import ndimage
+
+from maps.game_map import GameWorld, SimpleGameMap
+
+if TYPE_CHECKING:
+    from core.engine import Engine
+    from parts.entity import Actor
+
+# The measurements taken of every candidate floor, in the order of the columns of a metrics array
+metric_names = ["reachable_tiles", "stairs_distance", "verdant_regions", "monsters"]
+
+
+class FloorRequirements:
+    """
+    The minimum measurements wanted of a floor, along with an optional maximum number of monsters. Floors which miss a
+    requirement are ranked by how far they fall short of it, relative to the requirement itself.
+    """
+
+    def __init__(self, min_reachable_tiles: int = 0, min_stairs_distance: int = 0, min_verdant_regions: int = 0,
+                 min_monsters: int = 0, max_monsters: Optional[int] = None):
+        self.min_reachable_tiles = min_reachable_tiles
+        self.min_stairs_distance = min_stairs_distance
+        self.min_verdant_regions = min_verdant_regions
+        self.min_monsters = min_monsters
+        self.max_monsters = max_monsters
+
+    def shortfall(self, metrics: np.ndarray) -> np.ndarray:
+        """Return how far each row of a metrics array falls short of these requirements, 0 for floors meeting them."""
+        minimum = np.array([self.min_reachable_tiles, self.min_stairs_distance, self.min_verdant_regions,
+                            self.min_monsters], dtype=np.float64)
+        shortfall = (np.clip(minimum - metrics, 0, None) / np.maximum(minimum, 1)).sum(axis=1)
+        if self.max_monsters is not None:
+            monsters = metrics[:, metric_names.index("monsters")]
+            shortfall += np.clip(monsters - self.max_monsters, 0, None) / max(self.max_monsters, 1)
+        return shortfall
+
+
+class SeedResult:
+    """The measurements of the floor generated from a seed. floor holds the serialized floor, if it was kept."""
+
+    def __init__(self, seed: int, metrics: Dict[str, int], shortfall: float, floor: Optional[bytes] = None):
+        self.seed = seed
+        self.metrics = metrics
+        self.shortfall = shortfall
+        self.floor = floor
+
+    @property
+    def meets_requirements(self) -> bool:
+        return self.shortfall == 0
+
+    def to_json(self) -> dict:
+        return {"seed": self.seed, "shortfall": self.shortfall, **self.metrics}
+
+
+def search_seeds(settings: dict, player: Actor, seeds: Iterable[int], requirements: FloorRequirements,
+                 keep: int = 0, workers: Optional[int] = None) -> List[SeedResult]:
+    """
+    Generate a floor from each seed with a GameWorld's settings, and return them all ranked from best to worst.
+    Floors meeting more of the requirements rank first, followed by floors with more distant stairs and more reachable
+    tiles. The best keep floors are generated again and returned serialized, see load_floor.
+    Seeds are spread across the given number of worker processes, by default one per core. With a single worker they
+    are instead generated within this process.
+    """
+    seeds = [int(seed) for seed in seeds]
+    player = detached(player)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    executor = None
+    if workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        metrics = np.concatenate(map_chunks(executor, workers, measure_seeds, settings, player, seeds))
+        shortfall = requirements.shortfall(metrics)
+        columns = {name: metrics[:, index] for index, name in enumerate(metric_names)}
+        order = np.lexsort((-columns["reachable_tiles"], -columns["stairs_distance"], shortfall))
+
+        results = [SeedResult(seeds[i], {name: int(metrics[i, index]) for index, name in enumerate(metric_names)},
+                              float(shortfall[i])) for i in order.tolist()]
+        kept = results[:keep]
+        floors = map_chunks(executor, workers, serialize_seeds, settings, player, [result.seed for result in kept])
+        for result, floor in zip(kept, itertools.chain.from_iterable(floors)):
+            result.floor = floor
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return results
+
+
+def map_chunks(executor: Optional[concurrent.futures.Executor], workers: int, function: Callable, settings: dict,
+               player: Actor, seeds: List[int]) -> list:
+    """Call a worker function upon chunks of the seeds, returning the result for each chunk in order."""
+    if executor is None:
+        return [function(settings, player, seeds)]
+    # A few chunks per worker keeps every worker busy, even when some chunks are slower to generate than others
+    chunks = [chunk.tolist() for chunk in np.array_split(np.array(seeds, dtype=np.int64), workers * 4) if len(chunk)]
+    return list(executor.map(function, itertools.repeat(settings), itertools.repeat(player), chunks))
+
+
+def measure_seeds(settings: dict, player: Actor, seeds: List[int]) -> np.ndarray:
+    """Generate a floor from each seed and return an array of their measurements, for use within a worker process."""
+    engine = candidate_engine(settings, player)
+    metrics = [floor_metrics(generate_candidate(engine, seed)) for seed in seeds]
+    return np.array(metrics, dtype=np.int64).reshape(-1, len(metric_names))
+
+
+def serialize_seeds(settings: dict, player: Actor, seeds: List[int]) -> List[bytes]:
+    """Generate a floor from each seed and return each one serialized, for use within a worker process."""
+    engine = candidate_engine(settings, player)
+    floors = []
+    for seed in seeds:
+        dungeon = generate_candidate(engine, seed)
+        dungeon.remove_entity(engine.player)
+        del engine.player.parent
+        dungeon.engine = None
+        floors.append(lzma.compress(pickle.dumps((dungeon, (engine.player.x, engine.player.y)))))
+    return floors
+
+
+def load_floor(data: bytes, engine: Engine) -> SimpleGameMap:
+    """Attach a floor serialized by search_seeds to an engine, placing its player at the floor's start location."""
+    dungeon, player_location = pickle.loads(lzma.decompress(data))
+    dungeon.engine = engine
+    engine.player.place(*player_location, dungeon)
+    return dungeon
+
+
+def candidate_engine(settings: dict, player: Actor) -> Engine:
+    from core.engine import Engine
+
+    engine = Engine(player=player)
+    engine.game_world = GameWorld(engine=engine, pregenerate=False, **settings)
+    return engine
+
+
+def generate_candidate(engine: Engine, seed: int) -> SimpleGameMap:
+    from maps.procgen import generate_dungeon
+
+    engine.rng.seed_floor(seed)
+    return generate_dungeon(engine)
+
+
+def floor_metrics(dungeon: SimpleGameMap) -> List[int]:
+    """Return the measurements of a floor, in the order given by metric_names."""
+    verdant_regions = ndimage.label(dungeon.verdant, structure=np.ones((3, 3)))[1]
+    return [
+        int(dungeon.accessible.sum()),
+        int(dungeon.distance_from_start[dungeon.downstairs_location]),
+        int(verdant_regions),
+        sum(1 for actor in dungeon.dangerous_actors)
+    ]
+
+
+def detached(player: Actor) -> Actor:
+    """Return a copy of the player which is not part of any floor, so that it can be sent to a worker process."""
+    player = player.clone()
+    if hasattr(player, "parent"):
+        del player.parent
+    return player
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from config.setup_game import first_floor_settings
+    from core.engine import Engine
+    from data.monster_factory import create_monster_from_json
+
+    parser = argparse.ArgumentParser(description="Search seeds for floors which meet a set of requirements.")
+    parser.add_argument("--depth", type=int, default=1, help="floor number to generate (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="world seed which candidate floor seeds are drawn from")
+    parser.add_argument("--candidates", type=int, default=100, help="number of floors to generate")
+    parser.add_argument("--top", type=int, default=10, help="number of best seeds to report")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per core)")
+    parser.add_argument("--save", metavar="DIR", help="save the best floors into this directory")
+    parser.add_argument("--min-reachable-tiles", type=int, default=0)
+    parser.add_argument("--min-stairs-distance", type=int, default=0)
+    parser.add_argument("--min-verdant-regions", type=int, default=0)
+    parser.add_argument("--min-monsters", type=int, default=0)
+    parser.add_argument("--max-monsters", type=int)
+    args = parser.parse_args(argv)
+
+    engine = Engine(player=create_monster_from_json('data/monsters/player.json', 'player'), seed=args.seed)
+    game_world = GameWorld(engine=engine, pregenerate=False, **first_floor_settings)
+    for floor in range(args.depth):
+        game_world.advance_floor()
+    seeds = [game_world.floor_seed(args.depth, candidate) for candidate in range(args.candidates)]
+    requirements = FloorRequirements(args.min_reachable_tiles, args.min_stairs_distance, args.min_verdant_regions,
+                                     args.min_monsters, args.max_monsters)
+
+    results = search_seeds(game_world.settings, engine.player, seeds, requirements,
+                           keep=args.top if args.save else 0, workers=args.workers)
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        for result in results[:args.top]:
+            with open(os.path.join(args.save, f"floor_{args.depth}_{result.seed}.sav"), 'wb') as f:
+                f.write(result.floor)
+
+    report = {
+        "depth": args.depth,
+        "seed": args.seed,
+        "candidates": len(results),
+        "meeting_requirements": sum(result.meets_requirements for result in results),
+        "best": [result.to_json() for result in results[:args.top]]
+    }
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Picking random tiles of a map which meet some condition, e.g. somewhere to spawn an object or for a monster to wander
+to. The tiles meeting each condition are found once and cached, until the map is told that its tiles have changed.
+Conditions which change every turn, such as which tiles are occupied or visible, are checked only against the cached
+tiles rather than over the whole map.
+"""
+from __future__ import annotations
+
+import random
+from typing import Callable, Dict, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+import maps.tiles
+
+if TYPE_CHECKING:
+    from maps.game_map import SimpleGameMap
+
+
+def walkable_floor(gamemap: SimpleGameMap) -> np.ndarray:
+    """Tiles which can be walked over and are not holes."""
+    return gamemap.walkable & ~gamemap.has_flag(maps.tiles.TileFlag.Hole)
+
+
+def nontunnel_floor(gamemap: SimpleGameMap) -> np.ndarray:
+    """Walkable floor which is not part of a tunnel."""
+    return walkable_floor(gamemap) & ~gamemap.tunnel
+
+
+# The conditions which tiles may be sampled by, each a function returning a mask of the tiles of a map meeting it
+tile_conditions: Dict[str, Callable[[SimpleGameMap], np.ndarray]] = {
+    "walkable": walkable_floor,
+    "nontunnel": nontunnel_floor,
+}
+
+
+class TileSampler:
+    """Picks random tiles of a map meeting one of the tile_conditions, caching the tiles meeting each one."""
+
+    def __init__(self, gamemap: SimpleGameMap):
+        self.gamemap = gamemap
+        self.masks: Dict[str, np.ndarray] = {}
+        self.coordinates: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __getstate__(self) -> dict:
+        # The caches are cheap to rebuild, so are not worth saving along with the map
+        return {"gamemap": self.gamemap, "masks": {}, "coordinates": {}}
+
+    def invalidate(self) -> None:
+        """Forget every cached set of tiles. Must be called whenever the tiles of the map change."""
+        self.masks.clear()
+        self.coordinates.clear()
+
+    def mask(self, condition: str) -> np.ndarray:
+        """Return a mask of the tiles meeting a condition. The mask is shared, so must not be modified."""
+        if condition not in self.masks:
+            self.masks[condition] = tile_conditions[condition](self.gamemap)
+        return self.masks[condition]
+
+    def tiles(self, condition: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the x and y coordinates of the tiles meeting a condition, as given by np.nonzero."""
+        if condition not in self.coordinates:
+            self.coordinates[condition] = np.nonzero(self.mask(condition))
+        return self.coordinates[condition]
+
+    def random_tile(self, condition: str, rng: random.Random, unoccupied: bool = False,
+                    hidden: bool = False) -> Tuple[int, int]:
+        """
+        Return a random tile meeting a condition. If unoccupied is set, tiles with an actor upon them are skipped, and
+        if hidden is set, so are tiles currently within the player's FOV.
+        Raises ValueError if no tile is eligible.
+        """
+        x, y = self.tiles(condition)
+        if unoccupied or hidden:
+            eligible = np.ones(len(x), dtype=bool)
+            if unoccupied:
+                eligible &= self.gamemap.occupied[x, y] == 0
+            if hidden:
+                eligible &= ~self.gamemap.visible[x, y]
+            x, y = x[eligible], y[eligible]
+        index = rng.randint(0, len(x) - 1)
+        return int(x[index]), int(y[index])
+
+    def random_tile_within(self, condition: str, x: int, y: int, radius: int, rng: random.Random,
+                           unoccupied: bool = True) -> Optional[Tuple[int, int]]:
+        """
+        Return a random tile meeting a condition no more than radius tiles (Chebyshev distance) from x, y, other than
+        x, y itself. Only the tiles within radius are looked at. Returns None if no tile is eligible.
+        """
+        left, top = max(x - radius, 0), max(y - radius, 0)
+        window = (slice(left, x + radius + 1), slice(top, y + radius + 1))
+        eligible = self.mask(condition)[window].copy()
+        if unoccupied:
+            eligible &= self.gamemap.occupied[window] == 0
+        if 0 <= x - left < eligible.shape[0] and 0 <= y - top < eligible.shape[1]:
+            eligible[x - left, y - top] = False
+
+        nearby_x, nearby_y = np.nonzero(eligible)
+        if not len(nearby_x):
+            return None
+        index = rng.randint(0, len(nearby_x) - 1)
+        return left + int(nearby_x[index]), top + int(nearby_y[index])
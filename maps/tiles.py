@@ -1,5 +1,6 @@
+from enum import IntFlag
 from string import digits
-from typing import Tuple
+from typing import List, Tuple
 
 import numpy as np
 import tcod
@@ -12,6 +13,15 @@ graphic_dt = np.dtype([
 ]
 )
 
+
+class TileFlag(IntFlag):
+    """Properties shared by groups of tile types, stored as bits within the flags lookup table."""
+    Liquid = 1
+    Hole = 2
+    Verdant = 4
+    Hazard = 8
+
+
 # Tile struct used for statically defined tile data.
 tile_dt = np.dtype(
     [
@@ -20,25 +30,31 @@ tile_dt = np.dtype(
         ("transparent", np.bool),  # True if this tile doesn"t block FOV.
         ("dark", graphic_dt),  # Graphics for when this tile is not in FOV.
         ("light", graphic_dt),  # Graphics for when the tile is in FOV.
-        ("description", list)  # Description of the tile for the look menu
+        ("description", list),  # Description of the tile for the look menu
+        ("flags", np.uint8)  # TileFlag bits of the tile
     ]
 )
 
+# Every tile type, indexed by tile ID. Maps only store the ID of each of their tiles, which are looked up within the
+# tables built from these at the bottom of this module.
+tile_types: List[np.ndarray] = []
+
 
 def new_tile(*, name: str,
              walkable: bool, transparent: bool,
              dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
              light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-             description: list) -> np.ndarray:
+             description: list, flags: TileFlag = TileFlag(0)) -> int:
     """
-    Helper function for defining individual tile types
+    Helper function for defining individual tile types. Returns the ID of the new tile type.
     """
-    return np.array((name, walkable, transparent, dark, light, description), dtype=tile_dt)
+    tile_types.append(np.array((name, walkable, transparent, dark, light, description, flags), dtype=tile_dt))
+    return len(tile_types) - 1
 
 
-def get_clean_name(tile: tile_dt) -> str:
+def get_clean_name(tile: int) -> str:
     """Return the information of a selected tile without decoration, for use in look menu."""
-    name = tile[0]
+    name = str(names[tile])
     name = name.replace('_', '').capitalize()
     name = name.translate({ord(k): None for k in digits})
 
@@ -90,28 +106,32 @@ verdant_1 = new_tile(name="verdant_1",
                      light=(ord(","), tcod.green, (0, 0, 0)),
                      description=list("Unusual tufted grass, fractal succulents and dainty flowers have sprouted here, "
                                       "abandoning photosynthesis in lieu of the sustaining properties of "
-                                      "the mud they spring from."))
+                                      "the mud they spring from."),
+                     flags=TileFlag.Verdant)
 verdant_2 = new_tile(name="verdant_2",
                      walkable=True, transparent=True,
                      dark=(ord(" "), (255, 255, 255), (0, 0, 0)),
                      light=(ord("∙"), tcod.light_green, (0, 0, 0)),
                      description=list("Unusual tufted grass, fractal succulents and dainty flowers have sprouted here, "
                                       "abandoning photosynthesis in lieu of the sustaining properties of "
-                                      "the mud they spring from."))
+                                      "the mud they spring from."),
+                     flags=TileFlag.Verdant)
 verdant_3 = new_tile(name="verdant_3",
                      walkable=True, transparent=True,
                      dark=(ord(" "), (255, 255, 255), (0, 0, 0)),
                      light=(ord("'"), tcod.dark_green, (0, 0, 0)),
                      description=list("Unusual tufted grass, fractal succulents and dainty flowers have sprouted here, "
                                       "abandoning photosynthesis in lieu of the sustaining properties of "
-                                      "the mud they spring from."))
+                                      "the mud they spring from."),
+                     flags=TileFlag.Verdant)
 verdant_4 = new_tile(name="verdant_4",
                      walkable=True, transparent=True,
                      dark=(ord(" "), (255, 255, 255), (0, 0, 0)),
                      light=(ord("∙"), tcod.dark_green, (0, 0, 0)),
                      description=list("Unusual tufted grass, fractal succulents and dainty flowers have sprouted here, "
                                       "abandoning photosynthesis in lieu of the sustaining properties of "
-                                      "the mud they spring from."))
+                                      "the mud they spring from."),
+                     flags=TileFlag.Verdant)
 verdant_chars = [",", ".", "'", "∙"]
 verdant_tiles_1 = [verdant_1, verdant_2, verdant_3, verdant_4]
 
@@ -138,7 +158,8 @@ water = new_tile(name="water",
                  light=(ord("≈"), tcod.light_blue, (0, 0, 0)),
                  description=list("Deep, murky water covered with glowing green algae forms pools that twist and "
                                   "flow, pulled lower into the caves by tiny, hidden whirlpools. Fresh water "
-                                  "trickles from cracks in the ceiling, balancing the equilibrium."))
+                                  "trickles from cracks in the ceiling, balancing the equilibrium."),
+                 flags=TileFlag.Liquid | TileFlag.Hazard)
 
 # Stairs
 down_stairs = new_tile(
@@ -159,7 +180,8 @@ hole = new_tile(
     light=(ord("░"), (0, 0, 0), (36, 36, 36)),
     description=list("This area of the cave has recently collapsed, leaving a gigantic void, with the cave floor "
                      "serving as a cliff edge. You could jump down here, but you're certain that you would hurt "
-                     "yourself on jagged cliff edge as you descend.")
+                     "yourself on jagged cliff edge as you descend."),
+    flags=TileFlag.Hole | TileFlag.Hazard
 )
 waterfall = new_tile(
     name="waterfall",
@@ -168,5 +190,16 @@ waterfall = new_tile(
     dark=(ord("░"), (0, 0, 0), (36, 36, 36)),
     light=(ord("↓"), tcod.light_blue, (0, 0, 0)),
     description=list("A rushing waterfall is created from a deep chasm in the ground meeting a nearby body of water, "
-                     "falling into the dark depths beneath.")
+                     "falling into the dark depths beneath."),
+    flags=TileFlag.Liquid | TileFlag.Hazard
 )
+
+# Lookup tables of tile properties, indexed by tile ID
+tile_palette = np.array(tile_types, dtype=tile_dt)
+names = tile_palette["name"]
+walkable = tile_palette["walkable"]
+transparent = tile_palette["transparent"]
+dark = tile_palette["dark"]
+light = tile_palette["light"]
+descriptions = np.array(["".join(description) for description in tile_palette["description"]])
+flags = tile_palette["flags"]
@@ -1,19 +1,94 @@
 from __future__ import annotations
 
 import logging
-import random
-from random import randint
-from typing import Optional, List, Tuple, TYPE_CHECKING
+from typing import Dict, Optional, List, Sequence, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
-import tcod
 
 import core.actions
 import core.g
+from utils.math_utils import count_neighbours
 
 if TYPE_CHECKING:
+    from maps.game_map import SimpleGameMap
     from parts.entity import Actor
 
+# Offsets of the tiles surrounding a tile
+neighbour_offsets = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class ChaseField:
+    """
+    The cost of walking to a target from every tile of a map, computed with a single Dijkstra pass rooted at the
+    target. Any number of monsters chasing the target can then follow the field downhill instead of each searching for
+    its own path. Tiles are weighted as in BaseAI.get_path_to, by the "crowded" costs of the map's navigation grid,
+    which spread crowds of monsters out. A monster's own tile is not counted against it.
+    """
+
+    def __init__(self, gamemap: SimpleGameMap, target_x: int, target_y: int):
+        self.distance = gamemap.navigation.distance_map("crowded", target_x, target_y, cardinal=2, diagonal=3)
+        self.unreachable = np.iinfo(np.int32).max
+
+    def next_step(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """Return the next tile along a cheapest path from x, y to the target, or None if there is no path."""
+        if self.distance[x, y] == self.unreachable or self.distance[x, y] == 0:
+            return None
+        width, height = self.distance.shape
+        step, step_distance = None, self.unreachable
+        for dx, dy in neighbour_offsets:
+            next_x, next_y = x + dx, y + dy
+            if not (0 <= next_x < width and 0 <= next_y < height) or self.distance[next_x, next_y] == self.unreachable:
+                continue
+            # Cardinal and diagonal moves cost as much as in get_path_to
+            distance = self.distance[next_x, next_y] + (3 if dx and dy else 2)
+            if distance < step_distance:
+                step, step_distance = (next_x, next_y), distance
+        return step
+
+
+class Sense:
+    """What a single monster perceives of the player, as read from a row of a Perception table."""
+
+    def __init__(self, dx: int, dy: int, distance: int, visible: bool, adjacent: bool, crowding: int):
+        self.dx = dx  # Offset from the monster to the player
+        self.dy = dy
+        self.distance = distance  # Chebyshev distance to the player
+        self.visible = visible  # Whether the monster stands within the player's FOV
+        self.adjacent = adjacent  # Whether the player is close enough to be attacked
+        self.crowding = crowding  # Number of tiles surrounding the monster which are occupied by actors
+
+
+class Perception:
+    """
+    What each of a group of monsters perceives of a target, computed for all of them at once as arrays with one row per
+    monster, so that the monsters' AIs only have to look up their row. Rows describe the monsters where they stood when
+    the table was built; a monster which has since moved, or which was not in the group, has no row, and nor does any
+    monster once the target has moved.
+    """
+
+    def __init__(self, gamemap: SimpleGameMap, target: Actor, actors: Sequence[Actor]):
+        self.target = target
+        self.target_x, self.target_y = target.x, target.y
+        self.rows: Dict[Actor, int] = {actor: row for row, actor in enumerate(actors)}
+        self.x = np.fromiter((actor.x for actor in actors), dtype=np.int32, count=len(actors))
+        self.y = np.fromiter((actor.y for actor in actors), dtype=np.int32, count=len(actors))
+        self.dx = self.target_x - self.x
+        self.dy = self.target_y - self.y
+        self.distance = np.maximum(np.abs(self.dx), np.abs(self.dy))
+        self.visible = gamemap.visible[self.x, self.y]
+        self.adjacent = self.distance <= 1
+        self.crowding = count_neighbours(gamemap.occupied > 0)[self.x, self.y]
+
+    def sense(self, actor: Actor) -> Optional[Sense]:
+        """Return the row of a monster, or None if it has none or its row is out of date."""
+        row = self.rows.get(actor)
+        if row is None or (self.x[row], self.y[row]) != (actor.x, actor.y):
+            return None
+        if (self.target_x, self.target_y) != (self.target.x, self.target.y):
+            return None
+        return Sense(int(self.dx[row]), int(self.dy[row]), int(self.distance[row]), bool(self.visible[row]),
+                     bool(self.adjacent[row]), int(self.crowding[row]))
+
 
 class BaseAI(core.actions.Action):
     def perform(self) -> None:
@@ -24,29 +99,8 @@ class BaseAI(core.actions.Action):
         Compute and return a path to the target position.
         If there is no valid path then returns an empty list.
         """
-        # Copy the walkable array.
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.gamemap.entities:
-            # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += 10
-
-        # Create a graph from the cost array and pass that graph to a new pathfinder.
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-        pathfinder = tcod.path.Pathfinder(graph)
-
-        pathfinder.add_root((self.entity.x, self.entity.y))  # Start position.
-
-        # Compute the path to the destination and remove the starting point.
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-
-        # Convert from List[List[int]] to List[Tuple[int, int]].
-        return [(index[0], index[1]) for index in path]
+        # Tiles with blocking entities cost more to walk through, see maps.navigation.crowding_cost
+        return self.entity.gamemap.navigation.path("crowded", (self.entity.x, self.entity.y), (dest_x, dest_y))
 
     def path_isvalid(self, path) -> bool:
         """Helper tool to find out whether a path is valid. This is important as teleportation
@@ -65,19 +119,20 @@ class HostileEnemy(BaseAI):
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
+        self.last_seen: Optional[Tuple[int, int]] = None  # Where the player was when last chased
 
     def perform(self) -> None:
         # If player in fov, path towards or attack them.
-        target = core.g.engine.player
-        dx = target.x - self.entity.x
-        dy = target.y - self.entity.y
-        distance = max(abs(dx), abs(dy))  # Chebyshev distance.
+        sense = core.g.engine.perceive(self.entity)
 
         # Attack player if they are visible
-        if core.g.engine.game_map.visible[self.entity.x, self.entity.y]:
-            if distance <= 1:
-                return core.actions.MeleeAction(self.entity, dx, dy).perform()
-            self.path = self.get_path_to(target.x, target.y)
+        if sense.visible:
+            if sense.adjacent:
+                return core.actions.MeleeAction(self.entity, sense.dx, sense.dy).perform()
+            if self.chase(sense):
+                return None
+        else:
+            self.lose_sight()
 
         # If player not visible, check if a valid path exists and follow it
         if self.path:
@@ -91,12 +146,12 @@ class HostileEnemy(BaseAI):
         # If no valid path exists
         else:
             # 50% chance to do nothing
-            if randint(0, 100) <= 50:
+            if core.g.engine.rng.ai.randint(0, 100) <= 50:
                 return core.actions.WaitAction(self.entity).perform()
             # 40% chance to move to a random nearby tile
-            elif randint(0, 100) <= 90:
-                dest_x = self.entity.x + randint(-1, 1)
-                dest_y = self.entity.y + randint(-1, 1)
+            elif core.g.engine.rng.ai.randint(0, 100) <= 90:
+                dest_x = self.entity.x + core.g.engine.rng.ai.randint(-1, 1)
+                dest_y = self.entity.y + core.g.engine.rng.ai.randint(-1, 1)
                 if (dest_x < core.g.engine.game_map.width) and (dest_y < core.g.engine.game_map.height):
                     if dest_x != 0 and dest_y != 0:
                         return core.actions.MovementAction(self.entity, dest_x - self.entity.x,
@@ -105,15 +160,43 @@ class HostileEnemy(BaseAI):
                     return core.actions.WaitAction(self.entity).perform()
             # 10% chance to path to a random nearby tile up to 6 tiles away
             else:
-                # Make a new path for a tile somewhere nearby
-                dest_x, dest_y = core.g.engine.game_map.get_random_nearby_tile(self.entity.x, self.entity.y,
-                                                                               random.randint(2, 6))
-                if dest_x != 0 and dest_y != 0:
+                # Make a new path for a tile somewhere nearby, which is followed over the following turns
+                destination = core.g.engine.game_map.get_random_nearby_tile(
+                    self.entity.x, self.entity.y, core.g.engine.rng.ai.randint(2, 6), core.g.engine.rng.ai)
+                if destination:
+                    self.path = self.get_path_to(*destination)
+                if self.path:
+                    dest_x, dest_y = self.path.pop(0)
                     return core.actions.MovementAction(self.entity, dest_x - self.entity.x,
                                                        dest_y - self.entity.y).perform()
                 else:
                     return core.actions.WaitAction(self.entity).perform()
 
+    def chase(self, sense: Sense) -> bool:
+        """
+        Take a single step down the chase field shared by every monster hunting the player, remembering where the
+        player was in case they are lost from view. Returns False without moving if the player cannot be reached.
+        """
+        self.last_seen = (self.entity.x + sense.dx, self.entity.y + sense.dy)
+        self.path = []
+        step = core.g.engine.get_chase_field().next_step(self.entity.x, self.entity.y)
+        if step is None:
+            return False
+        core.actions.MovementAction(self.entity, step[0] - self.entity.x, step[1] - self.entity.y).perform()
+        return True
+
+    def lose_sight(self) -> None:
+        """Make for where the player was last seen, once they are no longer in view."""
+        if self.last_seen:
+            self.path = self.get_path_to(*self.last_seen)
+            self.last_seen = None
+
+    def wander(self) -> None:
+        """Take a single random step, or none at all. Used instead of perform while far away from the player."""
+        dx, dy = core.g.engine.rng.ai.randint(-1, 1), core.g.engine.rng.ai.randint(-1, 1)
+        if dx or dy:
+            core.actions.MovementAction(self.entity, dx, dy).perform()
+
 
 class HostileStationary(BaseAI):
     def __init__(self, entity: Actor):
@@ -121,14 +204,11 @@ class HostileStationary(BaseAI):
         self.path: List[Tuple[int, int]] = []
 
     def perform(self) -> None:
-        target = core.g.engine.player
-        dx = target.x - self.entity.x
-        dy = target.y - self.entity.y
-        distance = max(abs(dx), abs(dy))  # Chebyshev distance.
+        sense = core.g.engine.perceive(self.entity)
 
-        if core.g.engine.game_map.visible[self.entity.x, self.entity.y]:
-            if distance <= 1:
-                return core.actions.MeleeAction(self.entity, dx, dy).perform()
+        if sense.visible:
+            if sense.adjacent:
+                return core.actions.MeleeAction(self.entity, sense.dx, sense.dy).perform()
 
         else:
             return core.actions.WaitAction(self.entity).perform()
@@ -157,16 +237,15 @@ class BrainRaker(HostileEnemy):
     """Enemy variation where on every hit a random variation of explored, non-FOV tiles are purged from memory."""
 
     def perform(self) -> None:
-        target = core.g.engine.player
-        dx = target.x - self.entity.x
-        dy = target.y - self.entity.y
-        distance = max(abs(dx), abs(dy))  # Chebyshev distance.
+        sense = core.g.engine.perceive(self.entity)
 
-        if core.g.engine.game_map.visible[self.entity.x, self.entity.y]:
-            if distance <= 1:
-                return core.actions.BrainRakerAction(self.entity, dx, dy).perform()
-
-            self.path = self.get_path_to(target.x, target.y)
+        if sense.visible:
+            if sense.adjacent:
+                return core.actions.BrainRakerAction(self.entity, sense.dx, sense.dy).perform()
+            if self.chase(sense):
+                return None
+        else:
+            self.lose_sight()
 
         if self.path:
             if not self.path_isvalid(self.path):
@@ -198,9 +277,10 @@ class ConfusedEnemy(BaseAI):
         if self.turns_remaining <= 0:
             core.g.engine.message_log.add_message(f"The {self.entity.name} is no longer confused.")
             self.entity.ai = self.previous_ai
+            self.entity.gamemap.update_entity(self.entity)
         else:
             # Pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = core.g.engine.rng.ai.choice(
                 [
                     (-1, -1),  # Northwest
                     (0, -1),  # North
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import copy
-import random
 from typing import Optional, TYPE_CHECKING
 
 import config.colour
@@ -68,7 +67,7 @@ class RandomHealConsumable(Consumable):
 
     @property
     def random_heal(self):
-        return random.randint(self.lower_bound, self.upper_bound)
+        return core.g.engine.rng.items.randint(self.lower_bound, self.upper_bound)
 
     def activate(self, action: ItemAction) -> None:
         consumer = action.entity
@@ -92,7 +91,7 @@ class FireballDamageConsumable(Consumable):
 
     @property
     def damage(self):
-        return random.randint(self.lower_bound, self.upper_bound)
+        return core.g.engine.rng.items.randint(self.lower_bound, self.upper_bound)
 
     def get_action(self, consumer: Actor) -> core.input_handlers.AreaRangedAttackHandler:
         core.g.engine.message_log.add_message(
@@ -113,22 +112,23 @@ class FireballDamageConsumable(Consumable):
         core.g.engine.message_log.add_message(self.parent.usetext, config.colour.use)
 
         targets_hit = False
-        for actor in core.g.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                if actor.name == "Player":
-                    core.g.engine.message_log.add_message(
-                        f"You are engulfed in a fiery explosion, taking {self.damage} damage!"
-                    )
-                elif actor.name.endswith('s'):
-                    core.g.engine.message_log.add_message(
-                        f"The {actor.name} are engulfed in a fiery explosion, taking {self.damage} damage!"
-                    )
-                else:
-                    core.g.engine.message_log.add_message(
-                        f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
-                    )
-                actor.fighter.take_damage(self.damage)
-                targets_hit = True
+        game_map = core.g.engine.game_map
+        for actor in game_map.get_entities_within(*target_xy, self.radius,
+                                                  predicate=lambda entity: entity in game_map.actors):
+            if actor.name == "Player":
+                core.g.engine.message_log.add_message(
+                    f"You are engulfed in a fiery explosion, taking {self.damage} damage!"
+                )
+            elif actor.name.endswith('s'):
+                core.g.engine.message_log.add_message(
+                    f"The {actor.name} are engulfed in a fiery explosion, taking {self.damage} damage!"
+                )
+            else:
+                core.g.engine.message_log.add_message(
+                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
+                )
+            actor.fighter.take_damage(self.damage)
+            targets_hit = True
 
         if not targets_hit:
             core.g.engine.message_log.add_message("It has seems to have no effect...", config.colour.invalid)
@@ -143,20 +143,19 @@ class LightningDamageConsumable(Consumable):
 
     @property
     def damage(self):
-        return random.randint(self.lower_bound, self.upper_bound)
+        return core.g.engine.rng.items.randint(self.lower_bound, self.upper_bound)
 
     def activate(self, action: ItemAction) -> None:
         consumer = action.entity
+        game_map = self.parent.gamemap
         target = None
-        closest_distance = self.maximum_range + 1.0
 
-        for actor in core.g.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        # Strike the closest visible actor less than maximum_range + 1 tiles away
+        nearest = game_map.get_nearest_entities(
+            consumer.x, consumer.y, radius=self.maximum_range + 1, visible_only=True,
+            predicate=lambda entity: entity in game_map.actors and entity is not consumer)
+        if nearest and consumer.distance(nearest[0].x, nearest[0].y) < self.maximum_range + 1:
+            target = nearest[0]
 
         if target:
             # Display message for use whenever Item is consumed
@@ -215,6 +214,7 @@ class ConfusionConsumable(Consumable):
             target.ai = parts.ai.ConfusedEnemy(
                 entity=target, previous_ai=target.ai, turns_remaining=self.calc_turns,
             )
+            core.g.engine.game_map.update_entity(target)
         self.consume()
 
 
@@ -249,6 +249,6 @@ class TeleportOtherConsumable(Consumable):
                                                   )
 
             # Get a random walkable tile that is not in the player's FOV
-            random_x, random_y = core.g.engine.game_map.get_random_unoccupied_nonfov_tile()
+            random_x, random_y = core.g.engine.game_map.get_random_unoccupied_nonfov_tile(core.g.engine.rng.items)
             target.teleport(random_x, random_y)
         self.consume()
@@ -27,6 +27,8 @@ class Entity:
     """A generic parent object to represent players, enemies, items, etc."""
 
     parent: Union[SimpleGameMap, Inventory]
+    prototype: Optional[Tuple[str, str]] = None  # The data file and request of the template this was cloned from
+    spawn_number: int = 0  # The order in which the entity was added to its map, see SimpleGameMap.add_entity
 
     def __init__(self,
                  parent: Optional[SimpleGameMap] = None,
@@ -58,7 +60,7 @@ class Entity:
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
         self.render_order = render_order
         self.fighter = fighter
         self.ai = ai
@@ -93,25 +95,44 @@ class Entity:
     def gamemap(self) -> SimpleGameMap:
         return self.parent.gamemap
 
+    @property
+    def on_map(self) -> bool:
+        """True if this entity lies upon a map, rather than within an inventory or nowhere at all."""
+        parent = getattr(self, "parent", None)
+        return self in getattr(parent, "entities", ())
+
+    def clone(self: T) -> T:
+        """
+        Return a copy of this entity. Template data which is never modified, such as names and descriptions, is shared
+        with the original, while per-instance state is copied. This is much cheaper than a deepcopy.
+        """
+        clone = copy.copy(self)
+        clone.active_effects = [copy.copy(effect) for effect in self.active_effects]
+        for effect in clone.active_effects:
+            effect.parent = clone
+        return clone
+
     def spawn(self: T, gamemap: SimpleGameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[SimpleGameMap] = None) -> None:
         """Place this entity at a new location.  Handles moving across GameMaps."""
-        self.x = x
-        self.y = y
         if gamemap:
-            if hasattr(self, "parent"):  # Possibly uninitialized.
-                if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+            if self.on_map:
+                self.parent.remove_entity(self)
+            gamemap.remove_entity(self)  # In case the entity was already given to the map when it was created
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        else:
+            self.teleport(x, y)
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -120,12 +141,14 @@ class Entity:
         return math.sqrt((x - self.x) ** 2 + (y - self.y) ** 2)
 
     def move(self, dx, dy) -> None:
-        self.y += dy
-        self.x += dx
+        self.teleport(self.x + dx, self.y + dy)
 
     def teleport(self, x, y) -> None:
-        self.y = y
-        self.x = x
+        if self.on_map:
+            self.parent.move_entity(self, x, y)
+        else:
+            self.x = x
+            self.y = y
 
     def move_towards(self, target_x, target_y, game_map, entities):
         dx = target_x - self.x
@@ -202,7 +225,8 @@ class Actor(Entity):
             level: Level,
             description: str,
             abilities: Optional[List[Mutation]] = None,  # Inherent abilities
-            mutations: Optional[List[Mutation]] = None  # Added mutations/abilities
+            mutations: Optional[List[Mutation]] = None,  # Added mutations/abilities
+            speed: int = 100  # Actions taken per 100 of the player's, at the player's normal speed
     ):
         super().__init__(
             x=x,
@@ -230,12 +254,48 @@ class Actor(Entity):
 
         self.abilities = abilities
         self.mutations = mutations
+        self.speed = speed
 
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
         return bool(self.ai)
 
+    def clone(self) -> Actor:
+        """Copy this actor along with its fighter stats, inventory, equipment and AI state."""
+        clone = super().clone()
+        if self.ai:
+            clone.ai = copy.copy(self.ai)
+            clone.ai.entity = clone
+            if getattr(self.ai, "path", None):
+                clone.ai.path = list(self.ai.path)
+        clone.fighter = copy.copy(self.fighter)
+        clone.fighter.parent = clone
+        clone.level = copy.copy(self.level)
+        clone.level.parent = clone
+        clone.corpse = self.corpse.clone()
+        clone.corpse.parent = clone
+
+        clone.inventory = copy.copy(self.inventory)
+        clone.inventory.parent = clone
+        clone.inventory.items = [item.clone() for item in self.inventory.items]
+        for item in clone.inventory.items:
+            item.parent = clone.inventory
+
+        # Equipment slots must point to the copies of the items within the new inventory
+        clone.equipment = copy.copy(self.equipment)
+        clone.equipment.parent = clone
+        for original, item in zip(self.inventory.items, clone.inventory.items):
+            for slot, equipped in vars(self.equipment).items():
+                if equipped is original:
+                    setattr(clone.equipment, slot, item)
+
+        if self.abilities is not None:
+            clone.abilities = [copy.copy(ability) for ability in self.abilities]
+        if self.mutations is not None:
+            clone.mutations = list(self.mutations)
+        return clone
+
     def trigger_active_effects(self):
         """Function to be performed at the end of a turn. All active effects currently applied to the Actor are
         cycled through, and their effects are performed."""
@@ -296,6 +356,17 @@ class Item(Entity):
         self.usetext = usetext
         self.description = description
 
+    def clone(self) -> Item:
+        """Copy this item along with its consumable and equippable state."""
+        clone = super().clone()
+        if self.consumable:
+            clone.consumable = copy.copy(self.consumable)
+            clone.consumable.parent = clone
+        if self.equippable:
+            clone.equippable = copy.copy(self.equippable)
+            clone.equippable.parent = clone
+        return clone
+
 
 class Corpse(Entity):
     """An entity which is spawned upon the death of its parent."""
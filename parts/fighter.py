@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import random
 from typing import TYPE_CHECKING
 
 import core.g
@@ -52,18 +51,20 @@ class Fighter(BaseComponent):
     @property
     def damage(self):
         if self.parent and self.parent.equipment.damage_dice != 0:
-            damage = roll_dice(self.parent.equipment.damage_dice, self.parent.equipment.damage_sides)
+            damage = roll_dice(self.parent.equipment.damage_dice, self.parent.equipment.damage_sides,
+                               core.g.engine.rng.combat)
         else:
-            damage = roll_dice(self.damage_dice, self.damage_sides)
+            damage = roll_dice(self.damage_dice, self.damage_sides, core.g.engine.rng.combat)
 
         return damage
 
     @property
     def crit_damage(self):
         if self.parent and self.parent.equipment.damage_dice != 0:
-            damage = roll_dice(2 * self.parent.equipment.damage_dice, self.parent.equipment.damage_sides)
+            damage = roll_dice(2 * self.parent.equipment.damage_dice, self.parent.equipment.damage_sides,
+                               core.g.engine.rng.combat)
         else:
-            damage = roll_dice(2 * self.damage_dice, self.damage_sides)
+            damage = roll_dice(2 * self.damage_dice, self.damage_sides, core.g.engine.rng.combat)
 
         return damage
 
@@ -117,7 +118,7 @@ class Fighter(BaseComponent):
             death_message_color = enemy_die
 
             # Generate floor in its place
-            self.parent.char = random.choice(verdant_chars)
+            self.parent.char = core.g.engine.rng.rendering.choice(verdant_chars)
         else:
             if core.g.engine.player is self.parent:
                 death_message = 'YOU DIED'
@@ -129,8 +130,8 @@ class Fighter(BaseComponent):
 
         # Add to exiles list
         core.g.engine.game_map.exiles.append(self.parent)
-        core.g.engine.game_map.entities = set([x for x in core.g.engine.game_map.entities
-                                               if x not in core.g.engine.game_map.exiles])
+        core.g.engine.turn_queue.remove(self.parent)
+        core.g.engine.game_map.remove_entity(self.parent)
 
         # Load corpse object if not plant
         if not isinstance(self.parent.ai, HostileStationary) and not isinstance(self.parent.ai, PassiveStationary):
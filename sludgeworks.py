@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import multiprocessing
 import time
 import traceback
 from pathlib import Path
@@ -54,4 +55,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # Floors are pre-generated in worker processes, which frozen (PyInstaller) builds must support
+    multiprocessing.freeze_support()
     main()
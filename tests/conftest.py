@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# The game loads its data files by paths relative to the repository root
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+os.chdir(root)
+
+import core.g
+from config.setup_game import first_floor_settings
+from core.engine import Engine
+from data.monster_factory import create_monster_from_json
+from maps.game_map import GameWorld
+
+
+@pytest.fixture
+def make_engine():
+    """
+    Return a function starting a game from a seed on its first floor. Floors below are not pre-generated unless the
+    game is started with pregenerate=True, in which case the worker is shut down at the end of the test.
+    """
+    engines = []
+
+    def make(seed: int = 1, **settings) -> Engine:
+        player = create_monster_from_json('data/monsters/player.json', 'player')
+        engine = Engine(player=player, seed=seed)
+        engine.game_world = GameWorld(engine=engine, **{**first_floor_settings, "pregenerate": False, **settings})
+        engines.append(engine)
+        core.g.engine = engine
+        engine.game_world.generate_floor()
+        engine.update_fov()
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.game_world.stop_pregeneration()
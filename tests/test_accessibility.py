@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+
+import maps.tiles
+from maps.accessibility import AccessibilityMap
+from maps.game_map import SimpleGameMap
+
+
+def regions(accessibility: AccessibilityMap) -> np.ndarray:
+    """Return the region of every tile, numbered in order of first appearance so that labellings can be compared."""
+    roots = accessibility.roots()[accessibility.labels].ravel()
+    _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    numbered = order[inverse]
+    numbered[roots == 0] = -1
+    return numbered.reshape(accessibility.labels.shape)
+
+
+def rebuilt(dungeon: SimpleGameMap) -> AccessibilityMap:
+    accessibility = AccessibilityMap(dungeon)
+    accessibility.rebuild()
+    return accessibility
+
+
+def test_incremental_regions_match_a_rebuild_after_random_edits(make_engine):
+    dungeon = make_engine(seed=5).game_map
+    dungeon.accessibility.rebuild()
+    rng = random.Random(5)
+    for edit in range(300):
+        x, y = rng.randint(1, dungeon.width - 2), rng.randint(1, dungeon.height - 2)
+        tile = maps.tiles.wall if dungeon.is_walkable(x, y) else maps.tiles.floor_tiles_1[0]
+        dungeon.set_tile(x, y, tile)
+        if edit % 10 == 0:
+            assert np.array_equal(regions(dungeon.accessibility), regions(rebuilt(dungeon))), edit
+    assert np.array_equal(regions(dungeon.accessibility), regions(rebuilt(dungeon)))
+    assert np.array_equal(dungeon.accessible, dungeon.calc_accessible())
+
+
+def test_blocking_a_corridor_splits_its_region(make_engine):
+    engine = make_engine(seed=1)
+    dungeon = SimpleGameMap(engine, 20, 7)
+    floor = maps.tiles.floor_tiles_1[0]
+    dungeon.tiles[1:6, 1:6] = floor
+    dungeon.tiles[14:19, 1:6] = floor
+    dungeon.tiles[6:14, 3] = floor
+    dungeon.accessibility.rebuild()
+    assert dungeon.accessibility.connected((2, 2), (17, 2))
+
+    dungeon.set_tile(10, 3, maps.tiles.wall)
+    assert not dungeon.accessibility.connected((2, 2), (17, 2))
+    assert dungeon.accessibility.connected((2, 2), (9, 3))
+    assert dungeon.accessibility.connected((11, 3), (17, 5))
+    assert np.array_equal(regions(dungeon.accessibility), regions(rebuilt(dungeon)))
+
+    dungeon.set_tile(10, 3, floor)
+    assert dungeon.accessibility.connected((2, 2), (17, 2))
+    assert np.array_equal(regions(dungeon.accessibility), regions(rebuilt(dungeon)))
+
+
+def test_walling_off_a_single_tile_leaves_it_in_no_region(make_engine):
+    engine = make_engine(seed=1)
+    dungeon = SimpleGameMap(engine, 10, 10)
+    dungeon.tiles[1:9, 1:9] = maps.tiles.floor_tiles_1[0]
+    dungeon.accessibility.rebuild()
+    dungeon.set_tile(4, 4, maps.tiles.wall)
+    assert dungeon.accessibility.region(4, 4) == 0
+    assert dungeon.accessibility.connected((3, 4), (5, 4))
+    assert np.array_equal(regions(dungeon.accessibility), regions(rebuilt(dungeon)))
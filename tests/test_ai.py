@@ -0,0 +1,48 @@
+import maps.tiles
+from data.monster_factory import create_monster_from_json
+from maps.game_map import SimpleGameMap
+from parts.ai import Perception
+
+
+def open_room(engine, width: int = 12, height: int = 5) -> SimpleGameMap:
+    """Return a lit, empty room with the engine's player standing at its west end, making it the current map."""
+    dungeon = SimpleGameMap(engine, width, height)
+    dungeon.tiles[1:-1, 1:-1] = maps.tiles.floor_tiles_1[0]
+    engine.player.place(1, 2, dungeon)
+    engine.game_map = dungeon
+    dungeon.visible[:] = True
+    return dungeon
+
+
+def test_hunters_take_one_step_down_the_chase_field(make_engine):
+    engine = make_engine(seed=1)
+    dungeon = open_room(engine)
+    wretch = create_monster_from_json('data/monsters/scavengers.json', 'wretch').spawn(dungeon, 8, 2)
+    wretch.ai.perform()
+    assert (wretch.x, wretch.y) == (7, 2)
+    assert wretch.ai.path == []
+    assert wretch.ai.last_seen == (1, 2)
+
+
+def test_hunters_make_for_where_the_player_was_last_seen(make_engine):
+    engine = make_engine(seed=1)
+    dungeon = open_room(engine)
+    wretch = create_monster_from_json('data/monsters/scavengers.json', 'wretch').spawn(dungeon, 8, 2)
+    wretch.ai.perform()
+
+    dungeon.visible[:] = False
+    engine.chase_field = None
+    engine.player.place(1, 1)
+    wretch.ai.perform()
+    assert (wretch.x, wretch.y) == (6, 2)
+    assert wretch.ai.path and wretch.ai.path[-1] == (1, 2)
+    assert wretch.ai.last_seen is None
+
+
+def test_perception_counts_the_actors_crowding_each_monster(make_engine):
+    engine = make_engine(seed=1)
+    dungeon = open_room(engine)
+    wretches = [create_monster_from_json('data/monsters/scavengers.json', 'wretch').spawn(dungeon, x, y)
+                for x, y in [(2, 2), (3, 2), (3, 3), (8, 2)]]
+    perception = Perception(dungeon, engine.player, wretches)
+    assert [perception.sense(wretch).crowding for wretch in wretches] == [3, 2, 2, 0]
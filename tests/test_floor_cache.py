@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from maps.seed_search import floor_metrics
+
+
+def floor_contents(engine):
+    """Return everything about the engine's current floor which a cached copy must reproduce."""
+    dungeon = engine.game_map
+    entities = sorted((entity.name, entity.x, entity.y, getattr(getattr(entity, "fighter", None), "hp", -1))
+                      for entity in dungeon.entities if entity is not engine.player)
+    return {
+        "tiles": dungeon.tiles.tolist(),
+        "tunnel": dungeon.tunnel.tolist(),
+        "verdant": dungeon.verdant.tolist(),
+        "rooms": [[list(x), list(y)] for x, y in dungeon.rooms],
+        "stairs": tuple(dungeon.downstairs_location),
+        "player": (engine.player.x, engine.player.y),
+        "distance_from_start": dungeon.distance_from_start.tolist(),
+        "entities": entities,
+        "metrics": floor_metrics(dungeon),
+    }
+
+
+def test_cached_floors_match_generated_floors(make_engine, tmp_path):
+    generated = make_engine(seed=7)
+    stored = make_engine(seed=7, floor_cache=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+    loaded = make_engine(seed=7, floor_cache=str(tmp_path))
+
+    expected = floor_contents(generated)
+    assert floor_contents(stored) == expected
+    assert floor_contents(loaded) == expected
+    assert np.any(loaded.game_map.verdant)
+
+
+def test_storing_leaves_no_temporary_files(make_engine, tmp_path):
+    engine = make_engine(seed=2, floor_cache=str(tmp_path))
+    engine.game_world.generate_floor()
+    assert sorted(name.endswith(".npz") for name in os.listdir(tmp_path)) == [True, True]
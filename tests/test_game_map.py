@@ -0,0 +1,60 @@
+import math
+import random
+
+import pytest
+
+from parts.entity import Actor
+
+
+def test_entity_index_follows_moves_deaths_and_turns(make_engine):
+    engine = make_engine(seed=6)
+    dungeon = engine.game_map
+    rng = random.Random(6)
+    monsters = [actor for actor in dungeon.actors if actor is not engine.player]
+    engine.last_actor = engine.player  # Credited with the kills
+    for monster in monsters[:5]:
+        monster.fighter.die()
+    for monster in monsters[5:10]:
+        monster.place(*dungeon.get_random_walkable_tile(rng))
+    dungeon.check_entity_index()
+
+    for _ in range(100):
+        engine.update_fov()
+        engine.handle_enemy_turns()
+        engine.player.fighter.hp = engine.player.fighter.max_hp
+    dungeon.check_entity_index()
+    assert not any(monster in dungeon.actors for monster in monsters[:5])
+
+
+def test_radius_queries_match_a_search_of_every_entity(make_engine):
+    engine = make_engine(seed=6)
+    dungeon = engine.game_map
+    rng = random.Random(6)
+    for _ in range(20):
+        x, y, radius = rng.randrange(dungeon.width), rng.randrange(dungeon.height), rng.randint(1, 15)
+        found = dungeon.get_entities_within(x, y, radius, kind=Actor)
+        expected = [entity for entity in dungeon.entities
+                    if isinstance(entity, Actor) and math.hypot(entity.x - x, entity.y - y) <= radius]
+        assert set(found) == set(expected)
+        distances = [math.hypot(entity.x - x, entity.y - y) for entity in found]
+        assert distances == sorted(distances)
+
+        chebyshev = dungeon.get_entities_within(x, y, radius, metric="chebyshev")
+        assert set(chebyshev) == {entity for entity in dungeon.entities
+                                  if max(abs(entity.x - x), abs(entity.y - y)) <= radius}
+
+        nearest = dungeon.get_nearest_entities(x, y, k=3)
+        closest = sorted(math.hypot(entity.x - x, entity.y - y) for entity in dungeon.entities)[:3]
+        assert [math.hypot(entity.x - x, entity.y - y) for entity in nearest] == closest
+
+
+def test_checking_the_entity_index_leaves_it_alone_and_spots_stray_moves(make_engine):
+    dungeon = make_engine(seed=6).game_map
+    groups, cells = dungeon.entity_groups, dungeon.entity_cells
+    dungeon.check_entity_index()
+    assert dungeon.entity_groups is groups and dungeon.entity_cells is cells
+
+    monster = next(iter(dungeon.dangerous_actors))
+    monster.x += 1  # Moved behind the map's back
+    with pytest.raises(AssertionError):
+        dungeon.check_entity_index()
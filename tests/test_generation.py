@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+import maps.tiles
+from config.exceptions import MapGenError
+from data.monster_factory import monster_prototypes
+from maps.game_map import SimpleGameMap
+from maps.pipeline import RetryHook, Stage, run_stages
+from maps.procgen import add_stairs, spawn_batch, spawn_candidates
+
+
+def floor_snapshot(engine):
+    """Return the tiles, stairs, player location and entities of the engine's current floor."""
+    dungeon = engine.game_map
+    return (maps.tiles.names[dungeon.tiles].tolist(), tuple(dungeon.downstairs_location),
+            (engine.player.x, engine.player.y),
+            sorted((entity.name, entity.x, entity.y) for entity in dungeon.entities))
+
+
+def play_floors(engine, floors: int):
+    """Return snapshots of the engine's current floor and the floors below it."""
+    snapshots = [floor_snapshot(engine)]
+    for _ in range(floors - 1):
+        engine.game_world.generate_floor()
+        snapshots.append(floor_snapshot(engine))
+    return snapshots
+
+
+def test_the_same_seed_generates_the_same_floors(make_engine):
+    assert play_floors(make_engine(seed=11), 4) == play_floors(make_engine(seed=11), 4)
+
+
+def test_different_seeds_generate_different_floors(make_engine):
+    assert floor_snapshot(make_engine(seed=11)) != floor_snapshot(make_engine(seed=12))
+
+
+def test_eroded_floors_are_deterministic(make_engine):
+    stages = ["caves", "rooms", "erode", "rubble", "hazards", "features", "verdant", "connectivity", "player",
+              "stairs"]
+    assert floor_snapshot(make_engine(seed=3, stages=stages)) == floor_snapshot(make_engine(seed=3, stages=stages))
+
+
+def test_random_numbers_used_during_play_do_not_change_later_floors(make_engine):
+    quiet, busy = make_engine(seed=8), make_engine(seed=8)
+    for stream in (busy.rng.combat, busy.rng.ai, busy.rng.items, busy.rng.rendering):
+        for _ in range(100):
+            stream.random()
+    for _ in range(20):
+        busy.handle_enemy_turns()
+    assert play_floors(quiet, 3)[1:] == play_floors(busy, 3)[1:]
+
+
+def test_pregenerated_floors_match_floors_generated_in_place(make_engine):
+    pregenerated = make_engine(seed=9, pregenerate=True)
+    assert pregenerated.game_world.pregenerated_floor is not None
+    pregenerated.game_world.pregenerated_floor.result(timeout=120)
+    assert play_floors(pregenerated, 3) == play_floors(make_engine(seed=9), 3)
+
+
+def corridor(engine, length: int):
+    """Return a map holding a single straight corridor, with the engine's player standing at its west end."""
+    dungeon = SimpleGameMap(engine, length + 2, 3)
+    dungeon.tiles[1:length + 1, 1] = maps.tiles.floor_tiles_1[0]
+    engine.player.place(1, 1, dungeon)
+    return dungeon
+
+
+def test_stairs_are_placed_far_enough_from_the_player(make_engine):
+    dungeon = add_stairs(corridor(make_engine(seed=1), 40), min_distance=20)
+    assert dungeon.distance_from_start[dungeon.downstairs_location] > 20
+    assert dungeon.tiles[dungeon.downstairs_location] == maps.tiles.down_stairs
+
+
+def test_stairs_fall_back_to_the_furthest_tile(make_engine):
+    dungeon = add_stairs(corridor(make_engine(seed=1), 10), min_distance=20)
+    assert dungeon.downstairs_location == (10, 1)
+    assert dungeon.tiles[10, 1] == maps.tiles.down_stairs
+
+
+def test_stairs_cannot_be_placed_if_the_player_cannot_move(make_engine):
+    with pytest.raises(MapGenError):
+        add_stairs(corridor(make_engine(seed=1), 1))
+
+
+def test_failed_stages_are_retried_from_the_last_checkpoint_and_counted(make_engine):
+    engine = make_engine(seed=1)
+    runs = []
+
+    def flaky(dungeon, engine):
+        runs.append("flaky")
+        if runs.count("flaky") < 3:
+            raise MapGenError("Not yet.")
+
+    stages = [Stage("first", lambda dungeon, engine: runs.append("first"), checkpoint=True),
+              Stage("second", lambda dungeon, engine: runs.append("second")), Stage("flaky", flaky)]
+    retries = {}
+    run_stages(SimpleGameMap(engine, 10, 10), engine, stages, [RetryHook(retries)])
+    assert runs == ["first", "second", "flaky", "second", "flaky", "second", "flaky"]
+    assert retries == {"flaky": 2}
+
+
+def test_batches_spill_over_onto_fallback_tiles(make_engine):
+    engine = make_engine(seed=1)
+    dungeon = corridor(engine, 10)
+    candidates = np.zeros(dungeon.tiles.shape, dtype=bool)
+    candidates[3:5, 1] = True
+    names = ["wretch"] * 4
+    paths = ["data/monsters/scavengers.json"] * 4
+    spawned = spawn_batch(dungeon, monster_prototypes, paths, names, candidates, engine.rng.spawning,
+                          fallback=spawn_candidates(dungeon, min_player_distance=0))
+    locations = {(entity.x, entity.y) for entity in spawned}
+    assert len(locations) == 4 and {(3, 1), (4, 1)} <= locations
+
+
+def test_batches_without_enough_tiles_fail_without_spawning(make_engine):
+    engine = make_engine(seed=1)
+    dungeon = corridor(engine, 3)
+    entities = set(dungeon.entities)
+    with pytest.raises(MapGenError):
+        spawn_batch(dungeon, monster_prototypes, ["data/monsters/scavengers.json"] * 3, ["wretch"] * 3,
+                    spawn_candidates(dungeon, min_player_distance=0), engine.rng.spawning)
+    assert dungeon.entities == entities
@@ -0,0 +1,91 @@
+import collections
+import random
+
+import numpy as np
+
+from core.scheduler import TurnQueue, action_time, active_radius, distant_interval
+from parts.ai import HostileEnemy
+
+
+class Sleeper:
+    """A stand-in for an actor, which the turn queue only needs to be hashable."""
+
+    def __init__(self, name: str, speed: int = 100):
+        self.name = name
+        self.speed = speed
+
+
+def run_turns(queue: TurnQueue, actors, turns: int):
+    """Play turns of normal length, returning the names of the actors in the order they acted."""
+    for actor in actors:
+        queue.schedule(actor, 0)
+    order = []
+    now = 0
+    for _ in range(turns):
+        now += action_time(100)
+        while due := queue.pop_due(now):
+            time, actor = due
+            order.append(actor.name)
+            queue.schedule(actor, time + action_time(actor.speed))
+    return order
+
+
+def test_faster_actors_act_more_often():
+    order = run_turns(TurnQueue(), [Sleeper("fast", 200), Sleeper("normal"), Sleeper("slow", 50)], turns=8)
+    assert (order.count("fast"), order.count("normal"), order.count("slow")) == (17, 9, 5)
+
+
+def test_ties_are_broken_in_queue_order():
+    actors = [Sleeper(name) for name in "abc"]
+    assert run_turns(TurnQueue(), actors, turns=2) == list("abcabcabc")
+
+
+def test_rescheduling_replaces_the_earlier_action():
+    queue, actor = TurnQueue(), Sleeper("a")
+    queue.schedule(actor, 10)
+    queue.schedule(actor, 30)
+    assert queue.pop_due(20) is None
+    assert queue.pop_due(30) == (30, actor)
+    assert queue.pop_due(100) is None
+
+
+def test_removed_actors_do_not_act_and_are_released():
+    queue = TurnQueue()
+    actors = [Sleeper(str(index)) for index in range(10)]
+    for actor in actors:
+        queue.schedule(actor, 0)
+    for actor in actors[:8]:
+        queue.remove(actor)
+    assert actors[0] not in queue
+    assert len(queue.heap) <= 2 * len(queue.queued)
+    assert [queue.pop_due(0)[1], queue.pop_due(0)[1], queue.pop_due(0)] == [actors[8], actors[9], None]
+
+
+def test_leaving_a_floor_clears_the_queue(make_engine):
+    engine = make_engine(seed=3)
+    monster = next(actor for actor in engine.game_map.actors if actor is not engine.player)
+    engine.turn_queue.schedule(monster, engine.time)
+    engine.game_world.generate_floor()
+    assert not engine.turn_queue.queued and not engine.turn_queue.heap
+
+
+def test_each_distant_monster_wanders_once_per_interval_as_monsters_move(make_engine):
+    engine = make_engine(seed=6)
+    dungeon, player = engine.game_map, engine.player
+    rng = random.Random(6)
+    far = [(x, y) for x, y in zip(*np.nonzero(dungeon.accessible))
+           if max(abs(x - player.x), abs(y - player.y)) > active_radius]
+    wanderers = [actor for actor in dungeon.dangerous_actors if isinstance(actor.ai, HostileEnemy)]
+    assert len(wanderers) > distant_interval
+    for actor in wanderers:
+        actor.place(*rng.choice(far))
+    for _ in range(3):
+        turns = collections.Counter()
+        for _ in range(distant_interval):
+            active, wandering = engine.scheduler.plan_turn(engine)
+            assert not active
+            turns.update(wandering)
+            for actor in wanderers:
+                actor.place(*rng.choice(far))
+            engine.turn_number += 1
+        assert all(turns[actor] == 1 for actor in wanderers)
@@ -36,13 +36,21 @@ class Graph:
         """Function to find all connected tiles"""
         structure = np.ones((3, 3), dtype=np.bool)
         labeled, ncomponents = label(self.graph, structure)
-        island_value = labeled[i][j]
-
-        island_arr = np.full((self.rows, self.columns), False)
-        for x in range(self.rows):
-            for y in range(self.columns):
-                if labeled[x][y] == island_value:
-                    island_arr[x][y] = True
-                else:
-                    island_arr[x][y] = False
-        return island_arr
+        return labeled == labeled[i, j]
+
+
+def count_neighbours(mask: np.ndarray) -> np.ndarray:
+    """
+    Count, for every cell of a 2D boolean mask, how many of its 8 surrounding cells are set.
+    Cells outside of the mask are treated as unset, so edge cells only count their in-bounds neighbours.
+    """
+    width, height = mask.shape
+    padded = np.zeros((width + 2, height + 2), dtype=np.uint8)  # Cheaper than np.pad
+    padded[1:-1, 1:-1] = mask
+    counts = np.zeros((width, height), dtype=np.uint8)
+    for dx in range(3):
+        for dy in range(3):
+            if dx == dy == 1:
+                continue
+            counts += padded[dx:dx + width, dy:dy + height]
+    return counts
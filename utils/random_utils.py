@@ -1,9 +1,10 @@
 from logging import getLogger, DEBUG
 from math import floor
-from random import randint, choice, Random
+import random
+from random import randint, choice
+from typing import Optional
 
-# Initialize random number generator
-Random(1337)
+import numpy as np
 
 
 def from_dungeon_level(table, dungeon_level):
@@ -37,15 +38,70 @@ def random_choice_from_dict(choice_dict):
     return choices[random_choice_index(chances)]
 
 
-def roll_dice(num, dice):  # rolls dice, returns the sum of all rolls
+def roll_dice(num, dice, rng=random):  # rolls dice, returns the sum of all rolls
     roll = 0
     for x in range(0, num):
-        n = randint(1, dice)
+        n = rng.randint(1, dice)
         roll = roll + n
 
     return roll
 
 
+class RandomStream(random.Random):
+    """
+    A single seedable source of random numbers. Scalar draws use the usual random.Random methods, while bulk array
+    draws use the numpy Generator held in the numpy attribute. Both are seeded, saved and restored together.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        super().__init__(seed)
+
+    def seed(self, a: Optional[int] = None, version: int = 2) -> None:
+        super().seed(a, version)
+        self.numpy = np.random.default_rng(a)
+
+    def getstate(self) -> tuple:
+        return super().getstate(), self.numpy.bit_generator.state
+
+    def setstate(self, state: tuple) -> None:
+        python_state, numpy_state = state
+        super().setstate(python_state)
+        self.numpy.bit_generator.state = numpy_state
+
+
+class RandomStreams:
+    """
+    The engine's random number service. Every subsystem draws from its own stream, so that e.g. the number of combat
+    rolls made on a floor has no effect upon how the next floor is generated. All streams derive from a single master
+    seed, and the map generation streams are reseeded from the floor's own seed before each floor is built, which
+    allows a floor to be generated in another process, or reproduced later, with identical results.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.master_seed = seed
+
+        mapgen, spawning, ai, combat, items, rendering = np.random.SeedSequence(seed).spawn(6)
+        self.mapgen = RandomStream(stream_seed(mapgen))  # Terrain, rooms and hazards
+        self.spawning = RandomStream(stream_seed(spawning))  # Choice and placement of monsters, items and objects
+        self.ai = RandomStream(stream_seed(ai))  # Monster decisions
+        self.combat = RandomStream(stream_seed(combat))  # Attack, defence and damage rolls
+        self.items = RandomStream(stream_seed(items))  # Consumable effects
+        self.rendering = RandomStream(stream_seed(rendering))  # Purely cosmetic choices
+
+    def seed_floor(self, floor_seed: int) -> None:
+        """Reseed the map generation and spawning streams from the seed of the floor which is about to be built."""
+        mapgen, spawning = np.random.SeedSequence(floor_seed).spawn(2)
+        self.mapgen.seed(stream_seed(mapgen))
+        self.spawning.seed(stream_seed(spawning))
+
+
+def stream_seed(seed_sequence: np.random.SeedSequence) -> int:
+    """Return a 64-bit integer seed drawn from a numpy SeedSequence."""
+    return int(seed_sequence.generate_state(1, np.uint64)[0])
+
+
 def dnd_bonus_calc(value):
     bonus = floor((value - 10) / 2)
 